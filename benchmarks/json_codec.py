@@ -0,0 +1,144 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Compare the JSON codecs on Lando API shaped payloads.
+
+Usage:
+    python benchmarks/json_codec.py [--revisions N] [--number N] [PAYLOAD.json ...]
+
+Any JSON files given on the command line (e.g. stack responses saved from a
+Lando API instance with `curl`) are benchmarked alongside the synthetic
+payloads.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landoui import jsoncodec  # noqa: E402
+
+
+def stack_payload(revisions):
+    """A `GET /stacks/D<id>` response for a linear stack."""
+    phids = [f"PHID-DREV-{i:020d}" for i in range(revisions)]
+    return {
+        "repositories": [
+            {
+                "phid": "PHID-REPO-mozilla-central",
+                "short_name": "mozilla-central",
+                "url": "https://hg.mozilla.org/mozilla-central",
+                "landing_supported": True,
+                "approval_required": False,
+            }
+        ],
+        "revisions": [
+            {
+                "id": f"D{i}",
+                "phid": phid,
+                "status": {"value": "accepted", "display": "Accepted"},
+                "blocked_reason": "",
+                "bug_id": 1000000 + i,
+                "title": f"Bug {1000000 + i} - Change number {i} r=reviewer",
+                "url": f"https://phabricator.test/D{i}",
+                "date_created": "2021-03-04T05:06:07+00:00",
+                "date_modified": "2021-03-04T05:06:07+00:00",
+                "summary": "A summary line.\n" * 20,
+                "commit_message_title": f"Bug {1000000 + i} - Change number {i}",
+                "commit_message": f"Bug {1000000 + i} - Change number {i}\n\n"
+                + "Body text. " * 40,
+                "repo_phid": "PHID-REPO-mozilla-central",
+                "diff": {
+                    "id": i,
+                    "phid": f"PHID-DIFF-{i:020d}",
+                    "diff_id": i,
+                    "author": {"name": "Some Developer", "email": "dev@example.com"},
+                },
+                "author": {
+                    "phid": "PHID-USER-author",
+                    "username": "dev",
+                    "real_name": "Some Developer",
+                },
+                "reviewers": [
+                    {
+                        "phid": f"PHID-USER-reviewer{r}",
+                        "status": "accepted",
+                        "for_other": False,
+                        "identifier": f"reviewer{r}",
+                        "full_name": f"Reviewer {r}",
+                        "blocking_landing": False,
+                    }
+                    for r in range(3)
+                ],
+                "is_secure": False,
+                "is_using_secure_commit_message": False,
+            }
+            for i, phid in enumerate(phids)
+        ],
+        "edges": [[phids[i + 1], phids[i]] for i in range(revisions - 1)],
+        "landable_paths": [[[phid, i] for i, phid in enumerate(phids)]],
+        "uplift_repositories": [],
+    }
+
+
+def dryrun_payload(warnings):
+    """A `POST /transplants/dryrun` response with many warnings."""
+    return {
+        "confirmation_token": "0" * 64,
+        "blocker": None,
+        "warnings": [
+            {
+                "id": w % 8,
+                "display": "Revision has a warning that needs acknowledging.",
+                "instances": [
+                    {
+                        "revision_id": f"D{w}",
+                        "details": {"reason": "x" * 200, "diff_id": w},
+                    }
+                ],
+            }
+            for w in range(warnings)
+        ],
+    }
+
+
+def run(name, data, number):
+    encoded = json.dumps(data).encode("utf-8")
+    print(f"{name} ({len(encoded) / 1024:.0f} KiB)")
+    for codec in ("stdlib", "orjson"):
+        if jsoncodec.configure(codec) != codec:
+            print(f"  {codec:>7}: not installed")
+            continue
+
+        decode = min(
+            timeit.repeat(lambda: jsoncodec.loads(encoded), number=number, repeat=5)
+        )
+        encode = min(
+            timeit.repeat(lambda: jsoncodec.dumps(data), number=number, repeat=5)
+        )
+        print(
+            f"  {codec:>7}: loads {decode / number * 1e6:9.1f}us  "
+            f"dumps {encode / number * 1e6:9.1f}us"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payloads", nargs="*", help="JSON files to benchmark")
+    parser.add_argument("--revisions", type=int, default=50)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    run(
+        f"stack, {args.revisions} revisions", stack_payload(args.revisions), args.number
+    )
+    run("dryrun, 200 warnings", dryrun_payload(200), args.number)
+    for path in args.payloads:
+        with open(path, "rb") as f:
+            run(path, json.load(f), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Measure the cost of rendering the stack graph on the stack page.
+
+Usage:
+    python benchmarks/stack_page.py [--revisions N] [--number N]
+
+Renders `stack/stack.html` for a synthetic stack, and separately the graph
+alone using the former per-row SVG markup, and the single SVG drawing with
+a cold cache and with a warm cache.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landoui import template_helpers  # noqa: E402
+from landoui.app import create_app  # noqa: E402
+from landoui.forms import (  # noqa: E402
+    SecApprovalRequestForm,
+    TransplantRequestForm,
+)
+from landoui.stacks import StackGraph  # noqa: E402
+
+# The graph drawing partial as it was before the single SVG renderer.
+PER_ROW_SVG = """
+{%- for phid, drawing in rows %}
+<svg class="GraphDrawing" width="{{ drawing_width|graph_width }}"
+  height="{{graph_height()}}" version="1.1" xmlns="http://www.w3.org/2000/svg">
+  {% for target in drawing['above'] %}
+    <path d="{{drawing['pos']|graph_above_path(target)}}" fill="none" stroke="{{target|graph_color}}" stroke-width="1"/>
+  {% endfor %}
+  {% for target in drawing['below'] %}
+    <path d="{{drawing['pos']|graph_below_path(target)}}" fill="none" stroke="{{target|graph_color}}" stroke-width="1"/>
+  {% endfor %}
+  {% for target in drawing['other'] %}
+    <line x1="{{target|graph_x_pos}}" x2="{{target|graph_x_pos}}" y1="0" y2="{{graph_height()}}" stroke="{{target|graph_color}}" stroke-width="1"/>
+  {% endfor %}
+  <circle cx="{{drawing['pos']|graph_x_pos}}" stroke="{{drawing['pos']|graph_color}}"
+    fill="{{drawing['pos']|graph_color}}" cy="{{graph_height() / 2}}" r="3" />
+</svg>
+{%- endfor %}
+"""  # noqa: E501
+
+
+def synthetic_stack(revisions, seed=0):
+    """A stack response where each revision has one or two random parents."""
+    rng = random.Random(seed)
+    phids = ["PHID-DREV-{:020d}".format(i) for i in range(revisions)]
+    edges = set()
+    for child in range(1, revisions):
+        for _ in range(rng.randint(1, 2)):
+            edges.add((phids[child], phids[rng.randrange(max(0, child - 20), child)]))
+
+    return {
+        "repositories": [
+            {
+                "phid": "PHID-REPO-1",
+                "url": "https://hg.mozilla.org/mozilla-central",
+                "commit_flags": [],
+            }
+        ],
+        "revisions": [
+            {
+                "id": "D{}".format(i + 1),
+                "phid": phid,
+                "status": {"value": "accepted", "display": "Accepted", "closed": False},
+                "blocked_reason": "",
+                "bug_id": 1000000 + i,
+                "title": "Bug {} - Change number {}".format(1000000 + i, i),
+                "url": "https://phabricator.test/D{}".format(i + 1),
+                "repo_phid": "PHID-REPO-1",
+                "diff": {"id": i + 1},
+                "commit_message": "",
+                "reviewers": [
+                    {
+                        "phid": "PHID-USER-1",
+                        "status": "accepted",
+                        "for_other_diff": False,
+                        "identifier": "reviewer",
+                        "full_name": "Reviewer",
+                        "blocking_landing": False,
+                    }
+                ],
+            }
+            for i, phid in enumerate(phids)
+        ],
+        "edges": [list(edge) for edge in sorted(edges)],
+        "landable_paths": [],
+    }
+
+
+def environment():
+    for name, value in {
+        "OIDC_DOMAIN": "oidc.test",
+        "OIDC_CLIENT_ID": "client",
+        "OIDC_CLIENT_SECRET": "secret",
+        "LANDO_API_OIDC_IDENTIFIER": "lando-api",
+        "SENTRY_DSN": "",
+        "LOG_LEVEL": "ERROR",
+    }.items():
+        os.environ.setdefault(name, value)
+
+
+def best(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--revisions", type=int, default=500)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    environment()
+    app = create_app(
+        version_path="/nonexistent/version.json",
+        secret_key="benchmark",
+        session_cookie_name="lando-ui",
+        session_cookie_domain="lando-ui.test",
+        session_cookie_secure=False,
+        use_https=False,
+        enable_asset_pipeline=False,
+        lando_api_url="http://lando-api.test",
+    )
+
+    stack = synthetic_stack(args.revisions)
+    stack_graph = StackGraph(stack)
+    width, drawing_rows = stack_graph.drawing
+    rows = list(zip(reversed(stack_graph.order), reversed(drawing_rows)))
+    revision_phid = stack_graph.order[-1]
+
+    with app.test_request_context("/D1/"):
+        per_row = app.jinja_env.from_string(PER_ROW_SVG)
+        form = TransplantRequestForm()
+        sec_approval_form = SecApprovalRequestForm()
+
+        def render_page():
+            return app.jinja_env.get_template("stack/stack.html").render(
+                revision_id="D1",
+                series=None,
+                landable=set(),
+                dryrun=None,
+                stack=stack,
+                rows=rows,
+                drawing_width=width,
+                packed_drawing=None,
+                transplants=[],
+                revisions=stack_graph.revisions,
+                revision_phid=revision_phid,
+                sec_approval_form=sec_approval_form,
+                submitted_rev_url=None,
+                target_repo=None,
+                errors=[],
+                form=form,
+                flags=[],
+                existing_flags={},
+            )
+
+        def cold_svg():
+            template_helpers._render_graph_svg.cache_clear()
+            template_helpers._graph_curve.cache_clear()
+            return template_helpers.graph_svg(rows)
+
+        def per_row_svg():
+            return per_row.render(rows=rows, drawing_width=width)
+
+        print(
+            "{} revisions, {} columns, {} KiB of page".format(
+                len(rows), width, len(render_page()) // 1024
+            )
+        )
+        for name, fn in (
+            ("per-row svg", per_row_svg),
+            ("single svg, cold", cold_svg),
+            ("single svg, cached", lambda: template_helpers.graph_svg(rows)),
+            ("stack.html", render_page),
+        ):
+            seconds = best(fn, args.number)
+            print(
+                "  {:<26} {:8.2f}ms {:7.1f}us/row".format(
+                    name, seconds * 1e3, seconds / len(rows) * 1e6
+                )
+            )
+        print(
+            "  per-row svg markup {} KiB, single svg markup {} KiB".format(
+                len(per_row_svg()) // 1024, len(cold_svg()) // 1024
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,10 @@ import os
 from urllib.parse import urlparse
 
 from flask import Flask
-from flask_assets import Environment
 from flask_talisman import Talisman
-from webassets.loaders import YAMLLoader
 
-from landoui import auth, errorhandlers
+from landoui import auth, errorhandlers, jsoncodec, landoapi
+from landoui.helpers import str2bool
 from landoui.logging import log_config_change, MozLogFormatter
 from landoui.sentry import initialize_sentry
 
@@ -90,6 +89,101 @@ def create_app(
     set_config_param(
         app, "PHABRICATOR_URL", _lookup_service_url(lando_api_url, "phabricator")
     )
+    set_config_param(
+        app,
+        "LANDO_API_POOL_MAXSIZE",
+        int(os.getenv("LANDO_API_POOL_MAXSIZE", 8)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_POOL_IDLE_TIMEOUT",
+        float(os.getenv("LANDO_API_POOL_IDLE_TIMEOUT", 60)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_MAX_CONCURRENT_REQUESTS",
+        int(os.getenv("LANDO_API_MAX_CONCURRENT_REQUESTS", 8)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_STACK_CACHE_TTL",
+        float(os.getenv("LANDO_API_STACK_CACHE_TTL", 30)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_STACK_CACHE_SIZE",
+        int(os.getenv("LANDO_API_STACK_CACHE_SIZE", 1024)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_DRYRUN_CACHE_TTL",
+        float(os.getenv("LANDO_API_DRYRUN_CACHE_TTL", 60)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_REQUEST_DEADLINE",
+        float(os.getenv("LANDO_API_REQUEST_DEADLINE", 10)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_TIMEOUTS",
+        _parse_timeouts(os.getenv("LANDO_API_TIMEOUTS", "{}")),
+    )
+    set_config_param(app, "LANDO_API_RETRIES", int(os.getenv("LANDO_API_RETRIES", 2)))
+    set_config_param(
+        app,
+        "LANDO_API_CIRCUIT_WINDOW",
+        float(os.getenv("LANDO_API_CIRCUIT_WINDOW", 30)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_CIRCUIT_MIN_REQUESTS",
+        int(os.getenv("LANDO_API_CIRCUIT_MIN_REQUESTS", 10)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_CIRCUIT_FAILURE_RATE",
+        float(os.getenv("LANDO_API_CIRCUIT_FAILURE_RATE", 0.5)),
+    )
+    set_config_param(
+        app,
+        "LANDO_API_CIRCUIT_OPEN_SECONDS",
+        float(os.getenv("LANDO_API_CIRCUIT_OPEN_SECONDS", 15)),
+    )
+    set_config_param(
+        app,
+        "LANDING_QUEUE_PAGE_SIZE",
+        int(os.getenv("LANDING_QUEUE_PAGE_SIZE", 100)),
+    )
+    set_config_param(
+        app,
+        "LANDING_QUEUE_REPOSITORIES",
+        _parse_list(os.getenv("LANDING_QUEUE_REPOSITORIES", "mozilla-central")),
+    )
+    set_config_param(
+        app,
+        "STACK_GRAPH_CANVAS_MIN_ROWS",
+        int(os.getenv("STACK_GRAPH_CANVAS_MIN_ROWS", 0)),
+    )
+    set_config_param(
+        app,
+        "PREFETCH_LANDING_PREVIEW",
+        str2bool(os.getenv("PREFETCH_LANDING_PREVIEW", 0)),
+    )
+    set_config_param(
+        app, "STREAM_STACK_PAGE", str2bool(os.getenv("STREAM_STACK_PAGE", 0))
+    )
+    set_config_param(
+        app, "ASSETS_FROM_MANIFEST", str2bool(os.getenv("ASSETS_FROM_MANIFEST", 0))
+    )
+    set_config_param(
+        app,
+        "TRANSPLANT_OUTPUT_LIMIT",
+        int(os.getenv("TRANSPLANT_OUTPUT_LIMIT", 65536)),
+    )
+    set_config_param(
+        app, "JSON_CODEC", jsoncodec.configure(os.getenv("JSON_CODEC", "auto"))
+    )
     set_config_param(app, "SECRET_KEY", secret_key, obfuscate=True)
     set_config_param(app, "SESSION_COOKIE_NAME", session_cookie_name)
     set_config_param(app, "SESSION_COOKIE_DOMAIN", session_cookie_domain)
@@ -109,6 +203,28 @@ def create_app(
         bool(os.getenv("ENABLE_EMBEDDED_TRANSPLANT_UI")),
     )
 
+    landoapi.transport.configure(
+        pool_maxsize=app.config["LANDO_API_POOL_MAXSIZE"],
+        idle_timeout=app.config["LANDO_API_POOL_IDLE_TIMEOUT"],
+    )
+    landoapi.stack_cache.configure(
+        ttl=app.config["LANDO_API_STACK_CACHE_TTL"],
+        max_entries=app.config["LANDO_API_STACK_CACHE_SIZE"],
+    )
+    landoapi.dryrun_cache.configure(ttl=app.config["LANDO_API_DRYRUN_CACHE_TTL"])
+    landoapi.circuit_breakers.configure(
+        window=app.config["LANDO_API_CIRCUIT_WINDOW"],
+        min_requests=app.config["LANDO_API_CIRCUIT_MIN_REQUESTS"],
+        failure_rate=app.config["LANDO_API_CIRCUIT_FAILURE_RATE"],
+        open_seconds=app.config["LANDO_API_CIRCUIT_OPEN_SECONDS"],
+    )
+    landoapi.executor.configure(
+        max_workers=app.config["LANDO_API_MAX_CONCURRENT_REQUESTS"]
+    )
+
+    app.json_encoder = jsoncodec.JSONEncoder
+    app.json_decoder = jsoncodec.JSONDecoder
+
     Talisman(app, content_security_policy=csp, force_https=use_https)
 
     # Authentication
@@ -120,10 +236,12 @@ def create_app(
     from landoui.pages import pages
     from landoui.revisions import revisions
     from landoui.dockerflow import dockerflow
+    from landoui.assets import init_app as init_assets, static_assets
 
     app.register_blueprint(pages)
     app.register_blueprint(revisions)
     app.register_blueprint(dockerflow)
+    app.register_blueprint(static_assets)
 
     # Register template helpers
     from landoui.template_helpers import template_helpers
@@ -134,14 +252,7 @@ def create_app(
     errorhandlers.register_error_handlers(app)
 
     # Setup Flask Assets
-    assets = Environment(app)
-    if enable_asset_pipeline:
-        loader = YAMLLoader(
-            os.path.join(
-                os.path.dirname(os.path.abspath(__file__)), "assets_src/assets.yml"
-            )
-        )
-        assets.register(loader.load_bundles())
+    init_assets(app, enable_asset_pipeline)
 
     logger.info("Application started successfully.")
     return app
@@ -191,6 +302,20 @@ def initialize_logging():
     logger.info("logging configured", extra={"LOG_LEVEL": level})
 
 
+def _parse_timeouts(value):
+    """Merge a JSON object of {endpoint: [connect, read]} over the defaults."""
+    timeouts = dict(landoapi.DEFAULT_TIMEOUTS)
+    timeouts.update(
+        {endpoint: tuple(timeout) for endpoint, timeout in json.loads(value).items()}
+    )
+    return timeouts
+
+
+def _parse_list(value):
+    """Split a comma separated list, dropping empty items."""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 def _lookup_service_url(lando_api_url, service_name):
     # TODO: Restructure things to pull this information from lando-api
     # itself / lookup like other environment variables. Sticking this here
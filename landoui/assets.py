@@ -0,0 +1,203 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Building and serving the bundles defined in `assets_src/assets.yml`.
+
+Bundle outputs contain a hash of their content in the filename, which
+webassets records in `MANIFEST` when building. `flask lando-assets build`
+also writes precompressed copies of every bundle next to it, and the
+files under `static/build` are served from them with caching headers
+telling browsers to never revalidate a fingerprinted file.
+
+The build also writes `BUNDLE_MANIFEST`, mapping bundle names to their
+output files. With `ASSETS_FROM_MANIFEST` set, templates resolve bundle
+URLs from it alone, without loading `assets.yml` or checking whether the
+bundles are up to date.
+"""
+import gzip
+import json
+import logging
+import mimetypes
+import os
+import re
+
+import click
+import flask_assets
+from flask import (
+    Blueprint,
+    current_app,
+    request,
+    safe_join,
+    send_from_directory,
+    url_for,
+)
+from flask.cli import with_appcontext
+from webassets.loaders import YAMLLoader
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSETS_YAML = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "assets_src/assets.yml"
+)
+
+# Relative to the static folder, as are the bundle outputs.
+BUILD_DIR = "build"
+MANIFEST = "json:build/manifest.json"
+BUNDLE_MANIFEST = "build/bundles.json"
+
+# The key of the loaded bundle manifest in `app.extensions`.
+EXTENSION = "landoui.assets"
+
+# Content encodings we precompress for, in order of preference, with the
+# suffix of the precompressed copy.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Matches the `%(version)s` webassets puts in bundle output filenames.
+FINGERPRINT = re.compile(r"\.[0-9a-f]{8,}\.")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+static_assets = Blueprint("static_assets", __name__)
+
+
+def compress(path):
+    """Write the precompressed copies of the file at `path`.
+
+    A copy is only kept if it is smaller than the original. Brotli copies
+    are only written when the `brotli` package is installed.
+
+    Returns:
+        The paths of the copies which were written.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    compressors = {"gzip": lambda d: gzip.compress(d, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors["br"] = lambda d: brotli.compress(d, quality=11)
+
+    written = []
+    for encoding, suffix in ENCODINGS:
+        if encoding not in compressors:
+            continue
+        compressed = compressors[encoding](data)
+        if len(compressed) >= len(data):
+            continue
+        with open(path + suffix, "wb") as f:
+            f.write(compressed)
+        written.append(path + suffix)
+
+    return written
+
+
+def init_app(app, enable_asset_pipeline):
+    """Set up the bundles used by `app`'s templates.
+
+    With `ASSETS_FROM_MANIFEST` set the bundle manifest is loaded, and must
+    exist. Otherwise, if `enable_asset_pipeline` is set, the bundles from
+    `assets.yml` are registered with webassets, which rebuilds them when
+    their sources change.
+    """
+    app.config.setdefault("ASSETS_MANIFEST", MANIFEST)
+    env = flask_assets.Environment(app)
+    app.cli.add_command(assets)
+
+    if app.config["ASSETS_FROM_MANIFEST"]:
+        app.extensions[EXTENSION] = load_bundle_manifest(app.static_folder)
+    elif enable_asset_pipeline:
+        env.register(YAMLLoader(ASSETS_YAML).load_bundles())
+
+
+def load_bundle_manifest(static_folder):
+    """Return the {bundle name: output file} manifest written by the build."""
+    with open(os.path.join(static_folder, BUNDLE_MANIFEST)) as f:
+        return json.load(f)
+
+
+def build_bundles(env):
+    """Build every bundle registered with `env` and compress the outputs.
+
+    Also writes the bundle manifest for the bundles which were built.
+
+    Returns:
+        The paths of the files which were written.
+    """
+    written = []
+    manifest = {}
+    # webassets has no public way to list the names bundles are registered as.
+    for name, bundle in env._named_bundles.items():
+        bundle.build(force=True)
+        path = bundle.resolve_output()
+        manifest[name] = os.path.relpath(path, env.directory)
+        logger.info("built bundle", extra={"bundle": name, "path": path})
+        written.append(path)
+        written.extend(compress(path))
+
+    path = os.path.join(env.directory, BUNDLE_MANIFEST)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    written.append(path)
+
+    return written
+
+
+# Flask-Assets registers its own `assets` command, which does not compress
+# bundles or write the bundle manifest.
+@click.group("lando-assets")
+def assets():
+    """Web assets commands."""
+
+
+@assets.command()
+@with_appcontext
+def build():
+    """Build bundles and their precompressed copies."""
+    for path in build_bundles(current_app.jinja_env.assets_environment):
+        click.echo(path)
+
+
+assets.add_command(flask_assets.clean)
+assets.add_command(flask_assets.watch)
+
+
+@static_assets.app_template_global()
+def asset_urls(name):
+    """Return the URLs to include bundle `name` in a page with."""
+    manifest = current_app.extensions.get(EXTENSION)
+    if manifest is not None:
+        return [url_for("static", filename=manifest[name])]
+
+    env = current_app.jinja_env.assets_environment
+    if name not in env:
+        return []
+    return env[name].urls()
+
+
+@static_assets.route("/static/build/<path:filename>")
+def build_file(filename):
+    """Serve a built bundle, precompressed if the client accepts it."""
+    directory = os.path.join(current_app.static_folder, BUILD_DIR)
+    mimetype = mimetypes.guess_type(filename)[0]
+
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(
+            safe_join(directory, filename + suffix)
+        ):
+            response = send_from_directory(
+                directory, filename + suffix, mimetype=mimetype
+            )
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+
+    response.vary.add("Accept-Encoding")
+    if FINGERPRINT.search(filename):
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+    return response
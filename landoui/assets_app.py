@@ -2,7 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 """
-In order to build assets, the `flask assets build` command requires a
+In order to build assets, the `flask lando-assets build` command requires a
 reference to a python file which has an `app` variable available to import.
 This file provides that by initializing the flask app with basic configuration.
 If you just want to build assets run `invoke build_assets`, the output can
@@ -5,33 +5,26 @@ $.fn.landingPreview = function() {
     let $landingPreview = $(this);
     let $form = $('.StackPage-form');
     let $close = $landingPreview.find('.StackPage-landingPreview-close');
-    let $warnings = $landingPreview.find('.StackPage-landingPreview-warnings input[type=checkbox]');
-    let $blocker = $landingPreview.find('.StackPage-landingPreview-blocker');
+    let $body = $landingPreview.find('.StackPage-landingPreview-body');
     let $landButton = $landingPreview.find('.StackPage-landingPreview-land');
-    let $revisions = $landingPreview.find('.StackPage-landingPreview-revision');
-    let $expandAllButton = $landingPreview.find('.StackPage-landingPreview-expandAll');
-    let $collapseAllButton = $landingPreview.find('.StackPage-landingPreview-collapseAll');
+
+    // The preview is loaded when it is first opened, these are set then.
+    let $warnings = $();
+    let $blocker = $();
+    let preview = null;
+    let loaded = false;
 
     // Reach outside my component, because I'm a pragmatist.
     let $previewButton = $('.StackPage-preview-button');
 
 
-
-    // Form currently resides in the footer in its own component, so we
-    // need to listen to changes on flags outside of the form and update
-    // form field accordingly. TODO: make this better.
-    document.querySelectorAll('.flag-checkbox').forEach(item => {
-        item.addEventListener('change', event => {
-            let flags = [];
-            document.querySelectorAll('.flag-checkbox:checked').forEach(flag => {
-                flags.push(flag.value);
-            });
-            $form.find("[name=flags]").val(JSON.stringify(flags));
-        });
-    });
-
-
     let calculateLandButtonState = () => {
+      if(!loaded) {
+        $landButton.attr({'disabled': true});
+        $landButton.text('Loading landing preview...');
+        return;
+      }
+
       if($blocker.length > 0) {
         $landButton.attr({'disabled': true});
         $landButton.text('Landing is blocked');
@@ -146,98 +139,162 @@ $.fn.landingPreview = function() {
     };
 
 
-    let longMessages = 0;
-
-    $revisions.each(function () {
-      let $revision = $(this);
-
-      // Message display
-      let $displayMsgPanel = $revision.find('.StackPage-landingPreview-displayMessagePanel');
-      let $toggleButton = $revision.find('.StackPage-landingPreview-expand');
-      let $commitMessage = $revision.find('.StackPage-landingPreview-commitMessage');
-      let $seeMore = $revision.find('.StackPage-landingPreview-seeMore');
-      let lines = $commitMessage.text().split(/\r\n|\r|\n/).length;
+    // Bind the contents of a freshly loaded preview.
+    let initPreview = () => {
+      let $revisions = $body.find('.StackPage-landingPreview-revision');
+      let $expandAllButton = $body.find('.StackPage-landingPreview-expandAll');
+      let $collapseAllButton = $body.find('.StackPage-landingPreview-collapseAll');
 
-      // Message editing
-      let $editMessageBtn = $revision.find('.StackPage-landingPreview-editMessage');
-      let $editMsgPanel = $revision.find('.StackPage-landingPreview-editMessagePanel');
-      let $editMsgForm = $revision.find('form');
-      let $editMsgFormErrorsList = $editMsgForm.find('.StackPage-landingPreview-editMessagePanel-formErrors')
+      $warnings = $body.find('.StackPage-landingPreview-warnings input[type=checkbox]');
+      $blocker = $body.find('.StackPage-landingPreview-blocker');
 
-      ///////////////////////////
-      //
-      // Message display routines
-      //
-      ///////////////////////////
-
-      if (lines <= 5){
-        $toggleButton.hide();
-      } else {
-        // Handle long commit messages.
-
-        longMessages++;
-
-        // Sets up the display of how many lines are hidden:
-        // expandCommitMessage and collapseCommitMessage merely toggle this when clicked.
-        $toggleButton.text('Show all ' + lines + ' lines');
-        $seeMore.text('... (' + (lines - 5) + ' more lines)');
+      // Form currently resides in the footer in its own component, so we
+      // need to listen to changes on flags outside of the form and update
+      // form field accordingly. TODO: make this better.
+      $body.find('.flag-checkbox').on('change', () => {
+        let flags = [];
+        $body.find('.flag-checkbox:checked').each(function() {
+          flags.push(this.value);
+        });
+        $form.find("[name=flags]").val(JSON.stringify(flags));
+      });
 
-        $toggleButton.on('click', (e) => {
+      let longMessages = 0;
+
+      $revisions.each(function () {
+        let $revision = $(this);
+
+        // Message display
+        let $displayMsgPanel = $revision.find('.StackPage-landingPreview-displayMessagePanel');
+        let $toggleButton = $revision.find('.StackPage-landingPreview-expand');
+        let $commitMessage = $revision.find('.StackPage-landingPreview-commitMessage');
+        let $seeMore = $revision.find('.StackPage-landingPreview-seeMore');
+        let lines = $commitMessage.text().split(/\r\n|\r|\n/).length;
+
+        // Message editing
+        let $editMessageBtn = $revision.find('.StackPage-landingPreview-editMessage');
+        let $editMsgPanel = $revision.find('.StackPage-landingPreview-editMessagePanel');
+        let $editMsgForm = $revision.find('form');
+        let $editMsgFormErrorsList = $editMsgForm.find('.StackPage-landingPreview-editMessagePanel-formErrors')
+
+        ///////////////////////////
+        //
+        // Message display routines
+        //
+        ///////////////////////////
+
+        if (lines <= 5){
+          $toggleButton.hide();
+        } else {
+          // Handle long commit messages.
+
+          longMessages++;
+
+          // Sets up the display of how many lines are hidden:
+          // expandCommitMessage and collapseCommitMessage merely toggle this when clicked.
+          $toggleButton.text('Show all ' + lines + ' lines');
+          $seeMore.text('... (' + (lines - 5) + ' more lines)');
+
+          $toggleButton.on('click', (e) => {
+            e.preventDefault();
+            toggleCommitMessage($commitMessage, $seeMore, $toggleButton, lines);
+          });
+
+          $expandAllButton.on('click', (e) => {
+            e.preventDefault();
+            expandCommitMessage($commitMessage, $seeMore, $toggleButton, lines);
+          });
+
+          $collapseAllButton.on('click', (e) => {
+            e.preventDefault();
+            collapseCommitMessage($commitMessage, $seeMore, $toggleButton, lines)
+          });
+        }
+
+        ///////////////////////////
+        //
+        // Message editing routines
+        //
+        ///////////////////////////
+
+        $editMessageBtn.on('click', (e) => {
           e.preventDefault();
-          toggleCommitMessage($commitMessage, $seeMore, $toggleButton, lines);
+          $editMessageBtn.attr({'disabled': true});
+          swapDisplayEditPanels($displayMsgPanel, $editMsgPanel);
         });
 
-        $expandAllButton.on('click', (e) => {
+        $editMsgForm.on('submit', (e) => {
           e.preventDefault();
-          expandCommitMessage($commitMessage, $seeMore, $toggleButton, lines);
+          submitSecApprovalForm($editMsgForm, $editMsgFormErrorsList);
         });
 
-        $collapseAllButton.on('click', (e) => {
+        $editMsgForm.on('reset', (e) => {
           e.preventDefault();
-          collapseCommitMessage($commitMessage, $seeMore, $toggleButton, lines)
+          $editMessageBtn.attr({'disabled': false});
+          swapDisplayEditPanels($displayMsgPanel, $editMsgPanel);
         });
-      }
-
-      ///////////////////////////
-      //
-      // Message editing routines
-      //
-      ///////////////////////////
-
-      $editMessageBtn.on('click', (e) => {
-        e.preventDefault();
-        $editMessageBtn.attr({'disabled': true});
-        swapDisplayEditPanels($displayMsgPanel, $editMsgPanel);
       });
 
-      $editMsgForm.on('submit', (e) => {
-        e.preventDefault();
-        submitSecApprovalForm($editMsgForm, $editMsgFormErrorsList);
-      });
+      if ($revisions.length === 1 || longMessages === 0) {
+        $expandAllButton.css('display', 'none');
+        $collapseAllButton.css('display', 'none');
+      }
 
-      $editMsgForm.on('reset', (e) => {
-        e.preventDefault();
-        $editMessageBtn.attr({'disabled': false});
-        swapDisplayEditPanels($displayMsgPanel, $editMsgPanel);
+      $warnings.on('change', () => {
+        calculateLandButtonState();
       });
-    });
+    };
 
-    if ($revisions.length === 1 || longMessages === 0) {
-      $expandAllButton.css('display', 'none');
-      $collapseAllButton.css('display', 'none');
-    }
+    let loadPreview = () => {
+      if (preview === null) {
+        preview = fetch($body.data('preview-url'), {
+          credentials: 'same-origin',
+          headers: {'Accept': 'application/json'},
+        }).then(response => {
+          if (!response.ok) {
+            throw new Error('Bad response for landing preview: ' + response.status);
+          }
+          return response.json();
+        }).then(json => {
+          $body.html(json.html);
+          $form.find('[name=landing_path]').val(json.landing_path);
+          $form.find('[name=confirmation_token]').val(json.confirmation_token);
+          initPreview();
+          loaded = true;
+          calculateLandButtonState();
+        }).catch(err => {
+          console.error(err);
+          // Try again the next time the preview is opened.
+          preview = null;
+          $body.empty().append($('<p>', {
+            'class': 'StackPage-landingPreview-loading',
+            text: 'The landing preview could not be loaded, please try again.',
+          }));
+        });
+      }
+      return preview;
+    };
 
     $previewButton.on('click', (e) => {
       e.preventDefault();
       calculateLandButtonState();
       $landingPreview.css("display", "flex");
+      loadPreview();
     });
     $close.on('click', (e) => {
       e.preventDefault();
       $landingPreview.css("display", "none");
     });
-    $warnings.on('change', () => {
-      calculateLandButtonState();
-    });
+
+    // Optionally load the preview once the page has finished loading, so
+    // that it opens straight away.
+    if ($body.is('[data-prefetch]')) {
+      let prefetch = () => (window.requestIdleCallback || setTimeout)(loadPreview);
+      if (document.readyState === 'complete') {
+        prefetch();
+      } else {
+        $(window).on('load', prefetch);
+      }
+    }
   });
 };
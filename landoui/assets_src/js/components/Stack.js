@@ -9,5 +9,100 @@ $.fn.stack = function() {
       window.location.href = '/' + e.target.id;
       $radio.attr({'disabled': true});
     });
+
+    $stack.find('.StackPage-graphCanvas').stackGraphCanvas();
+  });
+};
+
+/**
+ * Draw a stack graph packed by `landoui.stacks.pack_drawing` on a canvas
+ * spanning every row of the stack table. Each row's part of the graph is
+ * scaled to the row's rendered height.
+ */
+$.fn.stackGraphCanvas = function() {
+  return this.each(function() {
+    let canvas = this;
+    if (!canvas.getContext) {
+      return;
+    }
+
+    let $rows = $(canvas).closest('tbody').children('tr');
+    let colWidth = Number(canvas.dataset.colWidth);
+    let colors = canvas.dataset.colors.split(',');
+    let packed = canvas.dataset.graph.split(',').map(Number);
+
+    // Unpack into one {pos, above, below, other} object per row.
+    let rows = [];
+    for (let i = 0; i < packed.length;) {
+      let row = {pos: packed[i++]};
+      row.above = packed.slice(i + 1, i + 1 + packed[i]);
+      i += 1 + packed[i];
+      row.below = packed.slice(i + 1, i + 1 + packed[i]);
+      i += 1 + packed[i];
+      row.other = [];
+      for (let ranges = packed[i++]; ranges > 0; ranges--) {
+        let start = packed[i++];
+        let length = packed[i++];
+        for (let col = start; col < start + length; col++) {
+          row.other.push(col);
+        }
+      }
+      rows.push(row);
+    }
+
+    let width = canvas.width;
+    let x = (col) => colWidth * col + colWidth / 2;
+    let color = (col) => colors[col % colors.length];
+
+    let draw = () => {
+      let top = $rows.first().offset().top;
+      let height = $rows.last().offset().top + $rows.last().outerHeight() - top;
+      let ratio = window.devicePixelRatio || 1;
+
+      canvas.style.width = width + 'px';
+      canvas.style.height = height + 'px';
+      canvas.width = width * ratio;
+      canvas.height = height * ratio;
+
+      let ctx = canvas.getContext('2d');
+      ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+      ctx.lineWidth = 1;
+
+      rows.forEach((row, i) => {
+        let $row = $rows.eq(i);
+        let y = $row.offset().top - top;
+        let h = $row.outerHeight();
+
+        row.above.forEach((target) => {
+          ctx.strokeStyle = color(target);
+          ctx.beginPath();
+          ctx.moveTo(x(target), y);
+          ctx.bezierCurveTo(x(target), y + h / 4, x(row.pos), y + h / 4, x(row.pos), y + h / 2);
+          ctx.stroke();
+        });
+        row.below.forEach((target) => {
+          ctx.strokeStyle = color(target);
+          ctx.beginPath();
+          ctx.moveTo(x(row.pos), y + h / 2);
+          ctx.bezierCurveTo(x(row.pos), y + 3 * h / 4, x(target), y + 3 * h / 4, x(target), y + h);
+          ctx.stroke();
+        });
+        row.other.forEach((target) => {
+          ctx.strokeStyle = color(target);
+          ctx.beginPath();
+          ctx.moveTo(x(target), y);
+          ctx.lineTo(x(target), y + h);
+          ctx.stroke();
+        });
+
+        ctx.fillStyle = color(row.pos);
+        ctx.beginPath();
+        ctx.arc(x(row.pos), y + h / 2, 3, 0, 2 * Math.PI);
+        ctx.fill();
+      });
+    };
+
+    draw();
+    $(window).on('resize', draw);
   });
 };
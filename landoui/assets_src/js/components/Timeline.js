@@ -9,7 +9,31 @@ $.fn.timeline = function() {
   });
 };
 
-$('button.cancel-landing-job').on('click', function(e) {
+/**
+ * Replace a timeline with a freshly rendered copy from the server. The
+ * whole page is reloaded if that fails.
+ */
+$.fn.refreshTimeline = function() {
+  return this.each(function() {
+    let $timeline = $(this);
+
+    fetch(this.dataset.timelineUrl, {credentials: 'same-origin'}).then(response => {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    }).then(html => {
+      let $updated = $($.parseHTML(html)).filter('.StackPage-timeline');
+      $timeline.replaceWith($updated);
+      $updated.timeline();
+    }).catch(() => {
+      window.location.reload();
+    });
+  });
+};
+
+// Handlers are delegated so that they keep working after a refresh.
+$(document).on('click', 'button.cancel-landing-job', function(e) {
     var button = $(this);
     var landing_job_id = this.dataset.landing_job_id;
 
@@ -23,7 +47,7 @@ $('button.cancel-landing-job').on('click', function(e) {
         },
     }).then(response => {
         if (response.status == 200) {
-            window.location.reload();
+            button.closest('.StackPage-timeline').refreshTimeline();
         } else if (response.status == 400) {
             button.prop("disabled", true);
             button.removeClass("is-danger").removeClass("is-loading").addClass("is-warning");
@@ -36,15 +60,41 @@ $('button.cancel-landing-job').on('click', function(e) {
     });
 });
 
-$("a.toggle-content,button.toggle-content").on("click", function() {
+$(document).on("click", "a.toggle-content,button.toggle-content", function() {
     /* A link with the `toggle-snippet` class will hide its parent, and show
      * any of the parent's siblings. For example:
      * <div>
      *  <div>Some content <a href="#" class="toggle-content">toggle</a></div>
      *  <div>Other content <a href="#" class="toggle-content">toggle</a></div>
      * </div>
+     *
+     * Elements in the siblings with a `data-content-url` attribute are
+     * filled with the text at that URL the first time they are shown.
     */
     var link = $(this);
     link.parent().hide();
-    link.parent().siblings().show()
+    link.parent().siblings().show().find("[data-content-url]").loadContent();
 });
+
+$.fn.loadContent = function() {
+  return this.each(function() {
+    let $content = $(this);
+    if ($content.data('loaded')) {
+      return;
+    }
+    $content.data('loaded', true);
+
+    $content.text('Loading…');
+    fetch(this.dataset.contentUrl, {credentials: 'same-origin'}).then(response => {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    }).then(text => {
+      $content.text(text);
+    }).catch(() => {
+      $content.data('loaded', false);
+      $content.text('Could not load the full output, try again later.');
+    });
+  });
+};
@@ -7,6 +7,8 @@ import time
 import requests
 from flask import Blueprint, current_app, g, jsonify, request
 
+from landoui.landoapi import circuit_breakers, get_timeout, transport
+
 logger = logging.getLogger(__name__)
 request_logger = logging.getLogger("request.summary")
 
@@ -56,12 +58,15 @@ def heartbeat():
     performing normally. Return a 5XX if something goes wrong.
     """
     try:
-        response = requests.get(
-            current_app.config["LANDO_API_URL"] + "/__lbheartbeat__"
+        response = transport.session().get(
+            current_app.config["LANDO_API_URL"] + "/__lbheartbeat__",
+            timeout=get_timeout(
+                current_app.config["LANDO_API_TIMEOUTS"], "__lbheartbeat__"
+            ),
         )
         response.raise_for_status()
         healthy = True
-    except (requests.HTTPError, requests.ConnectionError) as exc:
+    except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as exc:
         logger.warning(
             "unhealthy: problem with backing service",
             extra={
@@ -78,6 +83,9 @@ def heartbeat():
                 "services": {
                     "lando_api": healthy,
                 },
+                "circuits": {
+                    "lando_api": circuit_breakers.states(),
+                },
             }
         ),
         200 if healthy else 502,
@@ -7,7 +7,9 @@ from flask import render_template
 
 from landoui.sentry import sentry
 from landoui.landoapi import (
+    LandoAPICircuitOpen,
     LandoAPICommunicationException,
+    LandoAPIDeadlineExceeded,
     LandoAPIError,
     LandoAPIException,
 )
@@ -118,6 +120,38 @@ def landoapi_communication(e):
     )
 
 
+def landoapi_deadline_exceeded(e):
+    logger.warning("Lando API request deadline exceeded.", extra={"error": str(e)})
+
+    return (
+        render_template(
+            "errorhandlers/default_error.html",
+            title="Lando API is taking too long to respond",
+            message=(
+                "Lando API did not respond in time. This is usually temporary, "
+                "please try your request again in a moment."
+            ),
+        ),
+        504,
+    )
+
+
+def landoapi_circuit_open(e):
+    logger.warning("Lando API circuit open.", extra={"error": str(e)})
+
+    return (
+        render_template(
+            "errorhandlers/default_error.html",
+            title="Lando API is temporarily unavailable",
+            message=(
+                "Lando API is having trouble at the moment. Please try your "
+                "request again in a little while."
+            ),
+        ),
+        503,
+    )
+
+
 def landoapi_exception(e):
     sentry.captureException()
     logger.exception("Uncaught communication exception with Lando API.")
@@ -140,6 +174,8 @@ def landoapi_exception(e):
 
 def register_error_handlers(app):
     """Function to register error handlers on the flask app."""
+    app.register_error_handler(LandoAPICircuitOpen, landoapi_circuit_open)
+    app.register_error_handler(LandoAPIDeadlineExceeded, landoapi_deadline_exceeded)
     app.register_error_handler(LandoAPICommunicationException, landoapi_communication)
     app.register_error_handler(LandoAPIError, landoapi_exception)
     app.register_error_handler(LandoAPIException, landoapi_exception)
@@ -1,7 +1,13 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
-from flask import request, session
+import logging
+
+from flask import current_app, g, request, session, stream_with_context
+
+from landoui.landoapi import circuit_breakers, Deadline, LandoAPI, single_flight
+
+logger = logging.getLogger(__name__)
 
 
 def is_user_authenticated():
@@ -46,3 +52,111 @@ def get_phabricator_api_token():
         return request.cookies["phabricator-api-token"]
 
     return None
+
+
+def get_request_deadline():
+    """Return the deadline for Lando API requests made by the current request.
+
+    The deadline is created the first time this is called while handling
+    a request, and shared by every Lando API request made after that.
+    """
+    if "lando_api_deadline" not in g:
+        g.lando_api_deadline = Deadline(
+            current_app.config["LANDO_API_REQUEST_DEADLINE"]
+        )
+    return g.lando_api_deadline
+
+
+def get_lando_api(*, phabricator_api_token=None, **kwargs):
+    """Return a Lando API client for the current request.
+
+    The client sends the user's Auth0 access token and the provided
+    Phabricator API token, and uses the configured timeouts and retries,
+    the request's deadline and the process' circuit breakers. Identical
+    concurrent GET requests made by the process are coalesced. Other keyword
+    arguments are passed to `LandoAPI`.
+    """
+    return LandoAPI(
+        current_app.config["LANDO_API_URL"],
+        auth0_access_token=session.get("access_token"),
+        phabricator_api_token=phabricator_api_token,
+        deadline=get_request_deadline(),
+        timeouts=current_app.config["LANDO_API_TIMEOUTS"],
+        breakers=circuit_breakers,
+        retries=current_app.config["LANDO_API_RETRIES"],
+        single_flight=single_flight,
+        **kwargs,
+    )
+
+
+class DeferredContext(dict):
+    """A template context with values which are computed on first use.
+
+    The first time a template looks up a name which isn't in the context,
+    `load()` is called and the dict it returns is merged into the context.
+    """
+
+    def __init__(self, values, load):
+        super().__init__(values)
+        self._load = load
+
+    def _ensure_loaded(self):
+        if self._load is not None:
+            load, self._load = self._load, None
+            self.update(load())
+
+    def __contains__(self, key):
+        if not super().__contains__(key):
+            self._ensure_loaded()
+        return super().__contains__(key)
+
+    def __missing__(self, key):
+        if self._load is None:
+            raise KeyError(key)
+        self._ensure_loaded()
+        return self[key]
+
+
+def stream_template(template_name, *, deferred=None, **context):
+    """Render a template as an iterable of chunks of the page.
+
+    Like `render_template()`, but the page is sent to the client as it is
+    rendered, so it can start drawing it while slow parts of the context,
+    such as generators of upstream data, are still being consumed. Return
+    the result wrapped in a `Response`.
+
+    If `deferred` is provided it is called, and the dict it returns added
+    to the context, when the template first uses a name which isn't in
+    `context`. Everything rendered before that, such as the layout's head,
+    is sent without waiting for it.
+
+    As the response status has already been sent, an exception raised
+    while rendering is turned into the error the app's error handlers would
+    have responded with. It is rendered without the layout and appended to
+    what was sent so far.
+    """
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+    values = DeferredContext({**template.globals, **context}, deferred)
+    return stream_with_context(
+        _generate(template, template.new_context(values, shared=True))
+    )
+
+
+def _generate(template, context):
+    try:
+        yield from template.root_render_func(context)
+    except Exception as exc:
+        app = current_app._get_current_object()
+        # Error pages extend `errorhandlers/inline.html` instead of the layout.
+        g.inline_error_page = True
+        try:
+            response = app.make_response(app.handle_user_exception(exc))
+        except Exception:
+            yield template.environment.handle_exception()
+        else:
+            logger.info("error while streaming a page", exc_info=exc)
+            yield response.get_data(as_text=True)
+        finally:
+            g.pop("inline_error_page", None)
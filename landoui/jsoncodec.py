@@ -0,0 +1,309 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""JSON encoding and decoding for Lando API responses and our own views.
+
+`orjson` is used when it is installed and not disabled through the
+`JSON_CODEC` setting, otherwise everything goes through the standard
+library `json` module. Both produce the same Python objects when decoding,
+so callers never need to know which codec is active.
+
+Large documents can also be decoded with a projection, which keeps only the
+parts of the document a caller uses. When `ijson` is installed the document
+is parsed incrementally from a file-like object and the rest of it is never
+held in memory.
+"""
+import json
+import logging
+
+from flask.json import JSONDecoder as FlaskJSONDecoder
+from flask.json import JSONEncoder as FlaskJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+CODECS = ("auto", "orjson", "stdlib")
+
+# The codec currently in use, either "orjson" or "stdlib".
+codec = "orjson" if orjson is not None else "stdlib"
+
+
+def configure(name="auto"):
+    """Select the codec used by `loads`, `dumps` and the Flask classes.
+
+    Args:
+        name: One of `CODECS`. "auto" uses orjson if it is installed.
+            Asking for "orjson" when it isn't installed logs a warning and
+            falls back to the standard library.
+
+    Returns:
+        The name of the codec that is now active.
+
+    Raises:
+        ValueError: If `name` isn't a known codec.
+    """
+    global codec
+
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec {name!r}, expected one of {CODECS}")
+
+    if name == "orjson" and orjson is None:
+        logger.warning("orjson is not installed, falling back to stdlib json")
+
+    codec = "orjson" if name != "stdlib" and orjson is not None else "stdlib"
+    return codec
+
+
+def loads(data):
+    """Decode a JSON document from `str` or `bytes`.
+
+    Raises:
+        ValueError: If `data` isn't valid JSON or valid UTF-8.
+    """
+    if codec == "orjson":
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def dumps(obj):
+    """Encode `obj` as a compact JSON `str`."""
+    if codec == "orjson":
+        return orjson.dumps(obj).decode("utf-8")
+
+    return json.dumps(obj, separators=(",", ":"))
+
+
+class Truncated(str):
+    """A string which was cut short by a projection.
+
+    Attributes:
+        truncated: Always `True`, so templates can test for truncation.
+        length: The length of the original string.
+    """
+
+    truncated = True
+
+    def __new__(cls, value, length):
+        s = super().__new__(cls, value)
+        s.length = length
+        return s
+
+    def __getnewargs__(self):
+        return str(self), self.length
+
+
+def _truncate(value, limit):
+    if len(value) <= limit:
+        return value
+    return Truncated(value[:limit], len(value))
+
+
+def project(value, spec):
+    """Return the parts of a decoded JSON `value` selected by `spec`.
+
+    A spec is one of:
+        True: Keep the value as is.
+        An int: Keep the value, truncating any strings within it to that
+            many characters. Truncated strings are `Truncated` instances.
+        A dict: Keep only the keys of an object present in the spec, each
+            projected with its own spec. A "*" key matches any key not
+            listed explicitly.
+
+    A spec applies to every item of an array, so `{"id": True}` projects a
+    list of objects to a list of their ids.
+    """
+    if spec is True:
+        return value
+    if isinstance(value, list):
+        return [project(item, spec) for item in value]
+    if isinstance(spec, dict):
+        if not isinstance(value, dict):
+            return value
+        projected = {}
+        for key, item in value.items():
+            item_spec = spec.get(key, spec.get("*"))
+            if item_spec is not None and item_spec is not False:
+                projected[key] = project(item, item_spec)
+        return projected
+    if isinstance(value, dict):
+        return {key: project(item, spec) for key, item in value.items()}
+    if isinstance(value, str):
+        return _truncate(value, spec)
+    return value
+
+
+def load_projected(fp, spec):
+    """Decode the JSON document read from `fp` and project it with `spec`.
+
+    With `ijson` installed the document is parsed incrementally, so only
+    the projected data and the value currently being parsed are held in
+    memory. Otherwise the whole document is decoded first.
+
+    Raises:
+        ValueError: If the document isn't valid JSON or valid UTF-8.
+    """
+    if ijson is None:
+        return project(loads(fp.read()), spec)
+
+    try:
+        return _project_events(ijson.basic_parse(fp, use_float=True), spec)
+    except ijson.JSONError as exc:
+        raise ValueError(str(exc)) from exc
+
+
+def iter_projected(fp, spec):
+    """Yield the items of the JSON array read from `fp`, projected with `spec`.
+
+    With `ijson` installed each item is yielded as soon as it has been
+    parsed, so callers can start using the first items before the rest of
+    the document has been read. Otherwise the whole document is decoded
+    first.
+
+    Raises:
+        ValueError: If the document isn't a valid JSON array.
+    """
+    if ijson is None:
+        items = loads(fp.read())
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array")
+        for item in items:
+            yield project(item, spec)
+        return
+
+    try:
+        events = ijson.basic_parse(fp, use_float=True)
+        if next(events, (None, None))[0] != "start_array":
+            raise ValueError("Expected a JSON array")
+
+        depth = 0
+        item_events = []
+        for event, value in events:
+            if depth == 0 and event == "end_array":
+                break
+
+            item_events.append((event, value))
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+
+            if depth == 0:
+                yield _project_events(item_events, spec)
+                item_events = []
+        else:
+            raise ValueError("Incomplete JSON document")
+
+        # Reject anything after the end of the array.
+        for _ in events:
+            pass
+    except ijson.JSONError as exc:
+        raise ValueError(str(exc)) from exc
+
+
+def _child_spec(frame):
+    container, spec, key = frame
+    if container is None:
+        return None
+    if isinstance(spec, dict) and isinstance(container, dict):
+        return spec.get(key, spec.get("*"))
+    return spec
+
+
+def _project_events(events, spec):
+    """Build the projection of a document from its `ijson` parse events."""
+    root = []
+    # Each frame is [container, spec, current key]. Skipped containers
+    # still get a frame, with no container, to track nesting.
+    stack = [[root, spec, None]]
+    for event, value in events:
+        if event == "map_key":
+            stack[-1][2] = value
+            continue
+
+        if event in ("end_map", "end_array"):
+            container = stack.pop()[0]
+            if container is None:
+                continue
+            value = container
+        else:
+            item_spec = _child_spec(stack[-1])
+            if item_spec is None or item_spec is False:
+                if event in ("start_map", "start_array"):
+                    stack.append([None, None, None])
+                continue
+
+            if event == "start_map":
+                stack.append([{}, item_spec, None])
+                continue
+            if event == "start_array":
+                stack.append([[], item_spec, None])
+                continue
+            if isinstance(value, str) and not isinstance(item_spec, (bool, dict)):
+                value = _truncate(value, item_spec)
+
+        parent, _, key = stack[-1]
+        if isinstance(parent, list):
+            parent.append(value)
+        else:
+            parent[key] = value
+
+    if not root:
+        raise ValueError("Incomplete JSON document")
+    return root[0]
+
+
+class JSONEncoder(FlaskJSONEncoder):
+    """Flask JSON encoder which uses orjson when it is active.
+
+    `jsonify` and `flask.json.dumps` instantiate this class with their own
+    formatting options. Those orjson can honour are translated, anything
+    else falls back to the stdlib encoder. Values orjson can't serialize
+    natively, such as dates, are still handled by Flask's `default()`.
+    Documents orjson rejects but the stdlib accepts, such as those with
+    non-string keys or integers beyond 64 bits, are also encoded by the
+    stdlib encoder.
+    """
+
+    def encode(self, o):
+        if codec != "orjson" or self.indent not in (None, 2) or self.skipkeys:
+            return super().encode(o)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.indent == 2:
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            encoded = orjson.dumps(o, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            return super().encode(o)
+        return encoded.decode("utf-8")
+
+
+class JSONDecoder(FlaskJSONDecoder):
+    """Flask JSON decoder which uses orjson when it is active.
+
+    Custom hooks aren't supported by orjson, so a decoder constructed with
+    any of them always uses the stdlib implementation.
+    """
+
+    def __init__(self, **kwargs):
+        self._has_hooks = any(value is not None for value in kwargs.values())
+        super().__init__(**kwargs)
+
+    def decode(self, s, *args, **kwargs):
+        if codec != "orjson" or self._has_hooks:
+            return super().decode(s, *args, **kwargs)
+
+        return orjson.loads(s)
@@ -2,35 +2,685 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import asyncio
+import copy
+import functools
+import hashlib
 import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlencode
+
 import requests
-from json.decoder import JSONDecodeError
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from landoui import jsoncodec
 
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts in seconds for requests to each Lando API
+# endpoint, see `endpoint_name()`. Endpoints which aren't listed use the
+# "default" timeouts.
+DEFAULT_TIMEOUTS = {
+    "default": (3.05, 5),
+    "transplants": (3.05, 10),
+    "transplants/dryrun": (3.05, 10),
+}
+
+# Response status codes for which idempotent requests are retried, and the
+# base and maximum delays in seconds between retries.
+RETRY_STATUS_CODES = (502, 503, 504)
+RETRY_BACKOFF = 0.1
+RETRY_BACKOFF_CAP = 1.0
+
+
+def endpoint_name(url_path):
+    """Return the name of the Lando API endpoint for a request path.
+
+    Revision and object ids are stripped from the path so that all requests
+    to the same endpoint share a name, e.g. "stacks/D123" is "stacks" and
+    "landing_jobs/5" is "landing_jobs".
+    """
+    path = url_path.split("?", 1)[0].strip("/")
+    return "/".join(
+        segment for segment in path.split("/") if not re.fullmatch(r"D?\d+", segment)
+    )
+
+
+def get_timeout(timeouts, endpoint, deadline=None):
+    """Return the (connect, read) timeout to use for a request to `endpoint`.
+
+    If a `Deadline` is provided neither timeout will exceed the time
+    remaining until it.
+
+    Raises:
+        LandoAPIDeadlineExceeded: If the deadline has already passed.
+    """
+    connect, read = timeouts.get(endpoint, timeouts["default"])
+    if deadline is not None:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise LandoAPIDeadlineExceeded(
+                "Deadline exceeded before requesting {}".format(endpoint)
+            )
+        connect, read = min(connect, remaining), min(read, remaining)
+    return connect, read
+
+
+class Deadline:
+    """A point in time by which a set of Lando API requests must complete.
+
+    Views create one when they start handling a request and every Lando API
+    request made on its behalf is given at most the time remaining.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.expires = time.monotonic() + budget
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """Stop sending requests to an endpoint which is failing.
+
+    While the circuit is closed requests are sent and their outcomes are
+    recorded. If at least `min_requests` requests were made in the last
+    `window` seconds and `failure_rate` or more of them failed, the circuit
+    opens and requests are refused without being sent. After
+    `open_seconds` the circuit is half-open: a single trial request is
+    allowed, closing the circuit if it succeeds and opening it again if it
+    fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self, *, window=30, min_requests=10, failure_rate=0.5, open_seconds=15
+    ):
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.open_seconds
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Return whether a request may be sent now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.open_seconds
+            ):
+                self._state = self.HALF_OPEN
+                self._trial_in_progress = False
+
+            if self._state == self.HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+
+            return False
+
+    def record(self, *, success):
+        """Record the outcome of a request which `allow()` permitted."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_progress = False
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    self._failures = 0
+                else:
+                    self._open(now)
+                return
+
+            if self._state == self.OPEN:
+                # A request which was allowed before the circuit opened.
+                return
+
+            self._outcomes.append((now, success))
+            if not success:
+                self._failures += 1
+
+            while self._outcomes and now - self._outcomes[0][0] > self.window:
+                _, old_success = self._outcomes.popleft()
+                if not old_success:
+                    self._failures -= 1
+
+            if (
+                len(self._outcomes) >= self.min_requests
+                and self._failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._open(now)
+
+    def _open(self, now):
+        logger.warning("lando-api circuit opened")
+        self._state = self.OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+
+
+class CircuitBreakers:
+    """A process-wide collection of `CircuitBreaker`s, one per endpoint."""
+
+    def __init__(self, **settings):
+        self.settings = settings
+
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def configure(self, **settings):
+        """Update the breaker settings and reset all circuits."""
+        with self._lock:
+            self.settings.update(settings)
+            self._breakers = {}
+
+    def get(self, endpoint):
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(**self.settings)
+            return self._breakers[endpoint]
+
+    def states(self):
+        """Return a dictionary of each endpoint's circuit state."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.state for endpoint, breaker in breakers.items()}
+
+
+circuit_breakers = CircuitBreakers()
+
+
+class PooledTransport:
+    """A process-wide pool of keep-alive connections to Lando API.
+
+    A `requests.Session` is safe to share between threads for issuing
+    requests, so every `LandoAPI` instance in a worker borrows the same
+    session instead of paying for a new TCP/TLS handshake on each view.
+    Credentials are never stored on the shared session; they are sent as
+    headers on each request by `LandoAPI.request()`.
+
+    The session is recreated in a child process after a fork, as sockets
+    inherited from the parent must not be shared, and after it has been
+    idle for longer than `idle_timeout` seconds, as lando-api (or the load
+    balancer in front of it) will have closed those connections by then.
+    """
+
+    def __init__(self, *, pool_connections=1, pool_maxsize=8, idle_timeout=60):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._last_used = 0.0
+
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def configure(self, *, pool_connections=None, pool_maxsize=None, idle_timeout=None):
+        """Update the pool settings and drop any existing connections."""
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+            self._close()
+
+    def session(self):
+        """Return the shared session, creating a new one if required."""
+        now = time.monotonic()
+        with self._lock:
+            if self._session is not None and now - self._last_used > self.idle_timeout:
+                logger.debug("evicting idle lando-api connection pool")
+                self._close()
+
+            if self._session is None:
+                self._session = self._create_session()
+
+            self._last_used = now
+            return self._session
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _create_session(self):
+        session = requests.Session()
+
+        # The session is shared between users, so it must never hold on to
+        # cookies set by one user's response and send them with another's.
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _after_fork(self):
+        # The lock may have been held by another thread when the fork
+        # happened, and the parent's sockets must not be reused here.
+        self._lock = threading.Lock()
+        self._session = None
+        self._last_used = 0.0
+
+
+transport = PooledTransport()
+
+
+class RequestExecutor:
+    """A process-wide thread pool for issuing Lando API requests concurrently.
+
+    Views use this to overlap upstream calls which do not depend on each
+    other. The pool is created lazily so that it is started in each worker
+    process rather than inherited, thread-less, across a fork.
+    """
+
+    def __init__(self, *, max_workers=8):
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._executor = None
+
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def configure(self, *, max_workers=None):
+        """Update the pool settings, replacing any running pool."""
+        with self._lock:
+            if max_workers is not None:
+                self.max_workers = max_workers
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule `fn(*args, **kwargs)` and return a `Future` for it."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="landoapi"
+                )
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+
+executor = RequestExecutor()
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers making the same call.
+
+    The first caller for a key makes the call, callers arriving while it is
+    in progress wait for it to finish and receive its result, or have its
+    exception raised.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *, timeout=None):
+        """Return the result of `fn()`, sharing it with concurrent callers.
+
+        Args:
+            key: A hashable identifying the call.
+            fn: A callable making the call.
+            timeout: How long, in seconds, to wait for a call made by another
+                caller. `concurrent.futures.TimeoutError` is raised if it
+                doesn't finish in time.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = Future()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return call.result(timeout=timeout)
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+single_flight = SingleFlight()
+
+
+class CacheEntry:
+    """A cached Lando API response body and the metadata to revalidate it."""
+
+    __slots__ = ("content", "etag", "last_modified", "expires", "identity", "tags")
+
+    def __init__(self, content, *, etag, last_modified, ttl, identity, tags):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = time.monotonic() + ttl
+        self.identity = identity
+        self.tags = tags
+
+    def is_fresh(self):
+        return time.monotonic() < self.expires
+
+    def refresh(self, ttl):
+        self.expires = time.monotonic() + ttl
+
+    def validators(self):
+        """Return the conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """A bounded, thread-safe LRU cache of Lando API responses.
+
+    Entries are served without contacting Lando API for `ttl` seconds.
+    After that they are revalidated with a conditional request if Lando API
+    provided an `ETag` or `Last-Modified` header, and refetched otherwise.
+    The raw response body is cached rather than the decoded JSON, so each
+    caller receives its own copy of the data to modify as it pleases.
+    """
+
+    def __init__(self, *, ttl=30, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def configure(self, *, ttl=None, max_entries=None):
+        """Update the cache settings and drop all existing entries."""
+        with self._lock:
+            if ttl is not None:
+                self.ttl = ttl
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self._entries.clear()
+
+    def get(self, key):
+        """Return the entry for `key`, fresh or not, or `None`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, aliases=()):
+        """Store `entry` under `key` and any additional `aliases` keys.
+
+        Aliases share the entry, so they expire, are revalidated and are
+        invalidated together with it.
+        """
+        with self._lock:
+            for k in (key, *aliases):
+                self._entries[k] = entry
+                self._entries.move_to_end(k)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, identity, tags=None):
+        """Drop the entries cached for `identity`.
+
+        If `identity` is `None` entries cached for any identity are dropped.
+        If `tags` is provided only entries tagged with at least one of
+        them are dropped.
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if identity is not None and entry.identity != identity:
+                    continue
+                if tags is None or not entry.tags.isdisjoint(tags):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+stack_cache = ResponseCache()
+
+# Dryruns are expensive for Lando API to compute and their results only
+# change when the stack does, so they are briefly reused.
+dryrun_cache = ResponseCache(ttl=60)
+
+
+def stack_tags(stack):
+    """Return the revision ids and PHIDs contained in a stack response."""
+    tags = set()
+    for revision in stack.get("revisions", []):
+        tags.add(revision["id"])
+        tags.add(revision["phid"])
+    return frozenset(tags)
+
 
 class LandoAPI:
     """Client for Lando API."""
 
     def __init__(
-        self, url, *, phabricator_api_token=None, auth0_access_token=None, session=None
+        self,
+        url,
+        *,
+        phabricator_api_token=None,
+        auth0_access_token=None,
+        session=None,
+        cache=None,
+        dryrun_cache=None,
+        deadline=None,
+        timeouts=None,
+        breakers=None,
+        retries=0,
+        single_flight=None,
     ):
         self.url = url + "/" if url[-1] == "/" else url + "/"
         self.phabricator_api_token = phabricator_api_token
         self.auth0_access_token = auth0_access_token
         self.session = session or self.create_session()
+        self.cache = cache
+        self.dryrun_cache = dryrun_cache
+        self.deadline = deadline
+        self.timeouts = timeouts or DEFAULT_TIMEOUTS
+        self.breakers = breakers
+        self.retries = retries
+        self.single_flight = single_flight
 
     @staticmethod
     def create_session():
-        return requests.Session()
+        return transport.session()
+
+    @property
+    def identity(self):
+        """A digest of the credentials this client sends to Lando API."""
+        credentials = "{}\0{}".format(
+            self.auth0_access_token or "", self.phabricator_api_token or ""
+        )
+        return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+    def invalidate_stacks(self, revision_ids=None):
+        """Drop cached stacks containing any of `revision_ids`.
+
+        Landing a revision changes its stack for every user, so matching
+        stacks cached for any credentials are dropped. If `revision_ids`
+        is not provided every stack cached for this client's credentials
+        is dropped.
+        """
+        if self.cache is None:
+            return
 
-    def request(self, method, url_path, *, require_auth0=False, **kwargs):
+        if revision_ids is None:
+            self.cache.invalidate(self.identity)
+        else:
+            self.cache.invalidate(None, frozenset(revision_ids))
+
+    def invalidate_dryruns(self, revision_ids=None):
+        """Drop cached dryruns of landing paths containing any of `revision_ids`.
+
+        Landing a revision changes the dryrun result for every user, so
+        matching dryruns cached for any credentials are dropped. If
+        `revision_ids` is not provided every dryrun cached for this
+        client's credentials is dropped.
+        """
+        if self.dryrun_cache is None:
+            return
+
+        if revision_ids is None:
+            self.dryrun_cache.invalidate(self.identity)
+        else:
+            self.dryrun_cache.invalidate(None, frozenset(revision_ids))
+
+    def dryrun(self, landing_path, *, target_repo=None):
+        """Return the result of a landing dryrun for `landing_path`.
+
+        If this client has a dryrun cache a fresh result for the same
+        landing path, target repository and credentials is returned from
+        it. A new diff for any revision in the path changes the path, so
+        it is never served a stale result.
+
+        Args:
+            landing_path: A list of dicts with a "revision_id" and "diff_id".
+            target_repo: The PHID of the repository the path lands in.
+
+        Raises:
+            The same exceptions as `request()`.
+        """
+        if self.dryrun_cache is None:
+            return self.request(
+                "POST",
+                "transplants/dryrun",
+                require_auth0=True,
+                json={"landing_path": landing_path},
+            )
+
+        key = (
+            "transplants/dryrun",
+            self.identity,
+            target_repo,
+            tuple((r["revision_id"], r["diff_id"]) for r in landing_path),
+        )
+        entry = self.dryrun_cache.get(key)
+        if entry is not None and entry.is_fresh():
+            logger.debug("lando-api dryrun cache hit")
+            return self._decode(entry.content)
+
+        data = self.request(
+            "POST",
+            "transplants/dryrun",
+            require_auth0=True,
+            json={"landing_path": landing_path},
+        )
+        self.dryrun_cache.set(
+            key,
+            CacheEntry(
+                jsoncodec.dumps(data),
+                etag=None,
+                last_modified=None,
+                ttl=self.dryrun_cache.ttl,
+                identity=self.identity,
+                tags=frozenset(r["revision_id"] for r in landing_path),
+            ),
+        )
+        return data
+
+    def submit(self, method, url_path, **kwargs):
+        """Start a request in the background and return a `Future` for it.
+
+        Accepts the same arguments as `request()`. Calling `result()` on
+        the returned future returns the decoded response, or raises the
+        same exceptions `request()` would have raised.
+        """
+        return executor.submit(self.request, method, url_path, **kwargs)
+
+    def request(
+        self, method, url_path, *, require_auth0=False, projection=None, **kwargs
+    ):
         """Return the response of a request to Lando API.
 
+        If this client has a cache, `GET stacks/...` responses are served
+        from and stored in it. Unless a `timeout` is passed the request
+        uses the timeouts configured for its endpoint, cut short by the
+        client's deadline if it has one.
+
+        GET requests which fail to connect, time out or receive a 502, 503
+        or 504 response are retried up to `retries` times. If the client
+        has circuit breakers, requests to an endpoint with an open circuit
+        fail immediately. If the client has a `SingleFlight`, identical
+        concurrent GET requests share a single request to Lando API.
+
+        If a `projection` is given only the parts of the response it
+        selects are returned, see `jsoncodec.project()`. Successful
+        responses which aren't cached are then streamed and parsed
+        incrementally, so the rest of a large response is never held in
+        memory. Concurrent GET requests with the same projection share the
+        projected result.
+
         Args:
             method: HTTP method to use for request.
             url_path: Path to be appended to api url for request.
             require_auth0: Should an auth0 token be required and sent.
+            projection: Optional spec of the parts of the response to keep.
             **kwargs: All other kwargs passed to underlying requests.
 
         Returns:
@@ -43,7 +693,131 @@ class LandoAPI:
                 If the API returns an error response.
             LandoAPICommunicationException:
                 If there is an error communicating with the API.
+            LandoAPIDeadlineExceeded:
+                If the client's deadline passed before the API responded.
+            LandoAPICircuitOpen:
+                If requests to the endpoint are currently being refused.
         """
+        if self.deadline is not None and self.deadline.expired():
+            raise LandoAPIDeadlineExceeded(
+                "Deadline exceeded before requesting {}".format(url_path)
+            )
+
+        headers = self._headers(require_auth0)
+
+        cache_key = None
+        entry = None
+        if (
+            self.cache is not None
+            and method == "GET"
+            and url_path.startswith("stacks/")
+            and not kwargs.get("params")
+        ):
+            cache_key = (url_path, self.identity)
+            entry = self.cache.get(cache_key)
+            if entry is not None and entry.is_fresh():
+                logger.debug("lando-api cache hit", extra={"url_path": url_path})
+                return self._decode(entry.content, projection)
+
+            if entry is not None:
+                headers.update(entry.validators())
+
+        headers.update(kwargs.get("headers", {}))
+        kwargs["headers"] = headers
+
+        if projection is not None and cache_key is None:
+            kwargs["stream"] = True
+            if method == "GET" and self.single_flight is not None:
+                return self._send_shared(
+                    method, url_path, projection=projection, **kwargs
+                )
+            return self._send_projected(method, url_path, projection, **kwargs)
+
+        if kwargs.get("stream"):
+            response, content = self._send(method, url_path, **kwargs)
+        elif method == "GET" and self.single_flight is not None:
+            response, content = self._send_shared(method, url_path, **kwargs)
+        else:
+            response, content = self._send(method, url_path, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            logger.debug("lando-api cache revalidated", extra={"url_path": url_path})
+            entry.refresh(self.cache.ttl)
+            return self._decode(entry.content, projection)
+
+        if content is None:
+            return self._decode_stream(
+                response, projection if projection is not None else True
+            )
+
+        data = self._decode(content)
+        LandoAPIError.raise_if_error(response, data)
+
+        if cache_key is not None:
+            # Every revision in a stack has the same stack, so index the
+            # response by all of them. Walking through the revisions of a
+            # stack then only fetches it once.
+            aliases = [
+                ("stacks/{}".format(r["id"]), self.identity)
+                for r in data.get("revisions", [])
+            ]
+            self.cache.set(
+                cache_key,
+                CacheEntry(
+                    content,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    ttl=self.cache.ttl,
+                    identity=self.identity,
+                    tags=stack_tags(data),
+                ),
+                aliases=aliases,
+            )
+
+        if projection is not None:
+            return jsoncodec.project(data, projection)
+        return data
+
+    def iter_items(self, url_path, *, require_auth0=False, projection=True, **kwargs):
+        """Yield the items of the JSON array returned by a GET request.
+
+        The response is streamed and each item is yielded, projected with
+        `projection`, as soon as it has been parsed. The request is only
+        sent when the first item is requested. Responses are never cached
+        or shared with concurrent requests.
+
+        Accepts the same arguments as `request()`, and raises the same
+        exceptions while iterating.
+        """
+        if self.deadline is not None and self.deadline.expired():
+            raise LandoAPIDeadlineExceeded(
+                "Deadline exceeded before requesting {}".format(url_path)
+            )
+
+        headers = self._headers(require_auth0)
+        headers.update(kwargs.get("headers", {}))
+        kwargs["headers"] = headers
+        kwargs["stream"] = True
+
+        response, content = self._send("GET", url_path, **kwargs)
+        if content is not None:
+            LandoAPIError.raise_if_error(response, self._decode(content))
+
+        try:
+            with response:
+                response.raw.decode_content = True
+                yield from jsoncodec.iter_projected(response.raw, projection)
+        except ValueError as exc:
+            raise LandoAPICommunicationException(
+                "Lando API response could not be decoded as JSON"
+            ) from exc
+        except (requests.RequestException, urllib3.exceptions.HTTPError) as exc:
+            raise LandoAPICommunicationException(
+                "An error occurred when communicating with Lando API"
+            ) from exc
+
+    def _headers(self, require_auth0):
+        """Return the headers to send with a request to Lando API."""
         headers = {
             "Content-Type": "application/json",
         }
@@ -55,32 +829,226 @@ class LandoAPI:
         if self.phabricator_api_token:
             headers["X-Phabricator-API-Key"] = self.phabricator_api_token
 
-        headers.update(kwargs.get("headers", {}))
-        kwargs["headers"] = headers
+        return headers
+
+    def _send_shared(self, method, url_path, *, projection=None, **kwargs):
+        """Send a request, sharing it with identical concurrent requests.
+
+        Requests are identical if they have the same path, query parameters,
+        headers, which include the credentials sent, and projection. Without
+        a projection every caller gets the same response object but decodes
+        its own copy of the data. With one the response is streamed and
+        projected once, and every caller gets its own copy of the result.
+        """
+        params = kwargs.get("params") or {}
+        if isinstance(params, dict):
+            params = params.items()
+        key = (
+            url_path,
+            urlencode(sorted(params), doseq=True),
+            tuple(sorted(kwargs["headers"].items())),
+            jsoncodec.dumps(projection) if projection is not None else None,
+        )
+
+        if projection is None:
+            send = functools.partial(self._send, method, url_path, **kwargs)
+        else:
+            send = functools.partial(
+                self._send_projected, method, url_path, projection, **kwargs
+            )
+
+        timeout = None
+        if self.deadline is not None:
+            timeout = max(self.deadline.remaining(), 0)
 
         try:
-            response = self.session.request(method, self.url + url_path, **kwargs)
-
-            logger.debug(
-                "lando-api response",
-                extra={
-                    "status_code": response.status_code,
-                    "content_type": response.headers.get("Content-Type"),
-                },
+            result = self.single_flight.do(key, send, timeout=timeout)
+        except TimeoutError as exc:
+            raise LandoAPIDeadlineExceeded(
+                "Deadline exceeded while waiting for {}".format(url_path)
+            ) from exc
+
+        if projection is not None:
+            # Views modify the data they are given.
+            return copy.deepcopy(result)
+        return result
+
+    def _send_projected(self, method, url_path, projection, **kwargs):
+        """Send a streamed request and return its response, projected."""
+        response, content = self._send(method, url_path, **kwargs)
+        if content is None:
+            return self._decode_stream(response, projection)
+
+        data = self._decode(content)
+        LandoAPIError.raise_if_error(response, data)
+        return jsoncodec.project(data, projection)
+
+    def _send(self, method, url_path, **kwargs):
+        """Send a request, retrying it if allowed, and return the response.
+
+        Returns:
+            A tuple of the `requests.Response` and its content. If the
+            request is streamed the content of a successful response is
+            left unread and `None` is returned in its place.
+        """
+        endpoint = endpoint_name(url_path)
+        breaker = self.breakers.get(endpoint) if self.breakers is not None else None
+
+        # Only retry requests which are safe to repeat.
+        attempts = 1 + (self.retries if method == "GET" else 0)
+
+        timeout = kwargs.pop("timeout", None)
+        for attempt in range(attempts):
+            # A retry's backoff may have slept past the deadline.
+            if self.deadline is not None and self.deadline.expired():
+                raise LandoAPIDeadlineExceeded(
+                    "Deadline exceeded before requesting {}".format(url_path)
+                )
+            attempt_timeout = timeout or get_timeout(
+                self.timeouts, endpoint, self.deadline
             )
 
-            data = response.json()
-        except requests.RequestException as exc:
+            if breaker is not None and not breaker.allow():
+                raise LandoAPICircuitOpen(
+                    "Requests to {} are failing, not retrying yet".format(endpoint)
+                )
+
+            try:
+                response = self.session.request(
+                    method,
+                    self.url + url_path,
+                    timeout=attempt_timeout,
+                    **kwargs,
+                )
+
+                logger.debug(
+                    "lando-api response",
+                    extra={
+                        "status_code": response.status_code,
+                        "content_type": response.headers.get("Content-Type"),
+                    },
+                )
+
+                if kwargs.get("stream") and response.status_code < 400:
+                    content = None
+                else:
+                    content = response.content
+            except requests.RequestException as exc:
+                if breaker is not None:
+                    breaker.record(success=False)
+                if attempt + 1 < attempts and self._backoff(attempt):
+                    continue
+
+                if isinstance(exc, requests.Timeout):
+                    if self.deadline is not None and self.deadline.expired():
+                        raise LandoAPIDeadlineExceeded(
+                            "Deadline exceeded while requesting {}".format(url_path)
+                        ) from exc
+                    raise LandoAPICommunicationException(
+                        "Timed out when communicating with Lando API"
+                    ) from exc
+                raise LandoAPICommunicationException(
+                    "An error occurred when communicating with Lando API"
+                ) from exc
+            except BaseException:
+                # Anything else must still be recorded, or a half-open
+                # circuit would wait for its trial request forever.
+                if breaker is not None:
+                    breaker.record(success=False)
+                raise
+
+            if breaker is not None:
+                breaker.record(success=response.status_code < 500)
+            if (
+                response.status_code in RETRY_STATUS_CODES
+                and attempt + 1 < attempts
+                and self._backoff(attempt)
+            ):
+                continue
+
+            return response, content
+
+    def _backoff(self, attempt):
+        """Sleep before retrying and return whether a retry should be made.
+
+        Uses exponential backoff with full jitter. No retry is made if the
+        sleep would run past the client's deadline.
+        """
+        delay = random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF * 2 ** attempt))
+        if self.deadline is not None and self.deadline.remaining() <= delay:
+            return False
+
+        time.sleep(delay)
+        return True
+
+    @staticmethod
+    def _decode(content, projection=None):
+        try:
+            data = jsoncodec.loads(content)
+        except ValueError as exc:
+            # Covers both invalid JSON and bodies which aren't valid UTF-8.
             raise LandoAPICommunicationException(
-                "An error occurred when communicating with Lando API"
+                "Lando API response could not be decoded as JSON"
             ) from exc
-        except JSONDecodeError as exc:
+
+        if projection is not None:
+            return jsoncodec.project(data, projection)
+        return data
+
+    @staticmethod
+    def _decode_stream(response, projection):
+        """Decode a streamed response as it is read, keeping `projection`."""
+        try:
+            with response:
+                response.raw.decode_content = True
+                return jsoncodec.load_projected(response.raw, projection)
+        except ValueError as exc:
             raise LandoAPICommunicationException(
                 "Lando API response could not be decoded as JSON"
             ) from exc
+        except (requests.RequestException, urllib3.exceptions.HTTPError) as exc:
+            raise LandoAPICommunicationException(
+                "An error occurred when communicating with Lando API"
+            ) from exc
 
-        LandoAPIError.raise_if_error(response, data)
-        return data
+
+class AsyncLandoAPI:
+    """asyncio client for Lando API.
+
+    Requests are issued on the shared `RequestExecutor` by a `LandoAPI`
+    instance, so header handling, connection pooling and error semantics
+    are identical to the synchronous client. Awaiting several requests with
+    `asyncio.gather()` overlaps them without tying up a thread per request
+    in the calling code.
+    """
+
+    def __init__(self, url, **kwargs):
+        # The synchronous client, for call sites that aren't async.
+        self.sync = LandoAPI(url, **kwargs)
+
+    async def request(self, method, url_path, **kwargs):
+        """Return the response of a request to Lando API.
+
+        See `LandoAPI.request()` for the arguments, return value and
+        exceptions raised.
+        """
+        return await asyncio.wrap_future(self.sync.submit(method, url_path, **kwargs))
+
+
+def run_sync(coroutine):
+    """Run a coroutine to completion from synchronous code and return its result.
+
+    This lets synchronous views await `AsyncLandoAPI` requests, e.g.:
+
+        async def fetch():
+            return await asyncio.gather(
+                api.request("GET", "stacks/D1"),
+                api.request("GET", "transplants", params=...),
+            )
+
+        stack, transplants = run_sync(fetch())
+    """
+    return asyncio.run(coroutine)
 
 
 class LandoAPIException(Exception):
@@ -91,6 +1059,14 @@ class LandoAPICommunicationException(LandoAPIException):
     """Exception when communicating with Lando API fails."""
 
 
+class LandoAPIDeadlineExceeded(LandoAPICommunicationException):
+    """Exception when the time allowed for Lando API requests runs out."""
+
+
+class LandoAPICircuitOpen(LandoAPICommunicationException):
+    """Exception when requests to a failing Lando API endpoint are refused."""
+
+
 class LandoAPIError(LandoAPIException):
     """Exception when Lando API responds with an error."""
 
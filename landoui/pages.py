@@ -11,13 +11,23 @@ from flask import (
     make_response,
     redirect,
     render_template,
+    request,
+    Response,
     session,
 )
 
 from landoui.app import oidc
 from landoui.errorhandlers import UIError
 from landoui.forms import UserSettingsForm
-from landoui.helpers import set_last_local_referrer, is_user_authenticated
+from landoui.helpers import (
+    get_lando_api,
+    get_phabricator_api_token,
+    is_user_authenticated,
+    set_last_local_referrer,
+    str2bool,
+    stream_template,
+)
+from landoui.landoapi import LandoAPIException
 from landoui.usersettings import manage_phab_api_token_cookie
 
 logger = logging.getLogger(__name__)
@@ -26,6 +36,59 @@ pages = Blueprint("page", __name__)
 pages.before_request(set_last_local_referrer)
 
 
+# The fields of each landing job the queue page renders.
+QUEUE_PROJECTION = {
+    "priority": True,
+    "requester_email": True,
+    "bug_ids": True,
+    "repo_name": True,
+    "revision_order": True,
+    "created_at": True,
+}
+
+
+class QueuePage:
+    """A page of the landing queue, fetched while it is being rendered.
+
+    Iterating over `jobs` yields the landing jobs of the page as they are
+    received from Lando API. Once it is exhausted `has_next` says whether
+    there is a following page, and `error` is set if the queue couldn't be
+    fetched.
+
+    Args:
+        jobs: An iterator of landing jobs, starting at the first job of the
+            page and including at least one more job if there is one.
+        number: The number of the page, starting from 1.
+        per_page: The number of jobs on a page.
+    """
+
+    def __init__(self, jobs, *, number, per_page):
+        self._jobs = jobs
+        self.number = number
+        self.per_page = per_page
+        self.has_next = False
+        self.error = None
+
+    @property
+    def offset(self):
+        return (self.number - 1) * self.per_page
+
+    @property
+    def jobs(self):
+        try:
+            for i, job in enumerate(self._jobs):
+                if i == self.per_page:
+                    self.has_next = True
+                    break
+                yield job
+        except LandoAPIException:
+            logger.exception("landing queue could not be fetched")
+            self.error = "The landing queue could not be loaded, try again later."
+        finally:
+            # Stop reading the response if we didn't need all of it.
+            self._jobs.close()
+
+
 @pages.route("/")
 def home():
     enable_transplant_ui = current_app.config.get("ENABLE_EMBEDDED_TRANSPLANT_UI")
@@ -33,8 +96,37 @@ def home():
         # Return a static HTML page for users that are not logged in.
         return render_template("home.html")
 
-    # Render the landing queue.
-    return render_template("queue/queue.html")
+    number = max(request.args.get("page", 1, type=int), 1)
+    repository = request.args.get("repo") or None
+    mine = str2bool(request.args.get("mine"))
+    per_page = current_app.config["LANDING_QUEUE_PAGE_SIZE"]
+
+    # Ask for one job more than fits on the page, to tell if there is a
+    # following page.
+    params = {"offset": (number - 1) * per_page, "limit": per_page + 1}
+    if repository:
+        params["repository"] = repository
+    if mine:
+        params["requester_email"] = session["userinfo"].get("email")
+
+    api = get_lando_api(phabricator_api_token=get_phabricator_api_token())
+    queue = QueuePage(
+        api.iter_items("landing_queue", params=params, projection=QUEUE_PROJECTION),
+        number=number,
+        per_page=per_page,
+    )
+
+    # Render the landing queue, sending the first rows while the rest of
+    # the queue is still being received.
+    return Response(
+        stream_template(
+            "queue/queue.html",
+            queue=queue,
+            repository=repository,
+            repositories=current_app.config["LANDING_QUEUE_REPOSITORIES"],
+            mine=mine,
+        )
+    )
 
 
 @pages.route("/signin")
@@ -13,26 +13,35 @@ from flask import (
     redirect,
     render_template,
     request,
-    session,
+    Response,
     url_for,
 )
 
 from landoui.app import oidc
 from landoui.forms import SecApprovalRequestForm, TransplantRequestForm
 from landoui.helpers import (
+    get_lando_api,
     get_phabricator_api_token,
     is_user_authenticated,
     set_last_local_referrer,
+    stream_template,
 )
-from landoui.landoapi import LandoAPI, LandoAPIError
+from landoui.jsoncodec import Truncated
+from landoui.landoapi import dryrun_cache, LandoAPIError, stack_cache
 from landoui.errorhandlers import RevisionNotFound
-from landoui.stacks import draw_stack_graph, Edge, sort_stack_topological
+from landoui.stacks import pack_drawing, StackGraph
 
 logger = logging.getLogger(__name__)
 
 revisions = Blueprint("revisions", __name__)
 revisions.before_request(set_last_local_referrer)
 
+# The number of lines of a rejected hunk shown in the timeline until it is
+# expanded, and the number of characters of each hunk fetched for the stack
+# page. The whole hunk is loaded from `transplant_output` when expanded.
+REJECT_SNIPPET_LINES = 2
+REJECT_SNIPPET_LIMIT = 1024
+
 
 def oidc_auth_optional(f):
     """Decorator that runs auth only if the user is logged in."""
@@ -51,6 +60,105 @@ def oidc_auth_optional(f):
     return wrapped
 
 
+def transplant_projection(output_limit, snippet_limit=REJECT_SNIPPET_LIMIT):
+    """Return the projection of the transplant fields the timeline renders.
+
+    Raw error output is cut to `output_limit` characters and rejected hunks
+    to `snippet_limit` characters.
+    """
+    return {
+        "id": True,
+        "status": True,
+        "created_at": True,
+        "updated_at": True,
+        "requester_email": True,
+        "repository_url": True,
+        "details": output_limit,
+        "landing_path": {"revision_id": True, "diff_id": True},
+        "error_breakdown": {
+            "revision_id": True,
+            "failed_paths": {"path": True, "url": True, "changeset_id": True},
+            "reject_paths": {"*": {"path": True, "content": snippet_limit}},
+        },
+    }
+
+
+def prepare_timeline(transplants, revision_id):
+    """Annotate transplants with what the timeline needs to render them.
+
+    Each transplant gets the `output_url` of its full raw error output.
+    Each of its rejected hunks gets a `snippet` of its first
+    `REJECT_SNIPPET_LINES` lines, `more` if the hunk continues past the
+    snippet, and the `url` of the whole hunk.
+
+    Args:
+        transplants: A list of transplants projected with
+            `transplant_projection()`. They are modified in place.
+        revision_id: The id of a revision in the stack, as an int.
+    """
+    for transplant in transplants:
+        transplant["output_url"] = url_for(
+            "revisions.transplant_output",
+            revision_id=revision_id,
+            transplant_id=transplant["id"],
+        )
+
+        breakdown = transplant.get("error_breakdown")
+        if not breakdown:
+            continue
+
+        for path, reject in (breakdown.get("reject_paths") or {}).items():
+            content = reject.get("content") or ""
+            lines = content.split("\n", REJECT_SNIPPET_LINES)
+            reject["snippet"] = "\n".join(lines[:REJECT_SNIPPET_LINES])
+            reject["more"] = len(lines) > REJECT_SNIPPET_LINES or isinstance(
+                content, Truncated
+            )
+            reject["url"] = url_for(
+                "revisions.transplant_output",
+                revision_id=revision_id,
+                transplant_id=transplant["id"],
+                path=path,
+            )
+
+
+def get_stack_graph(api, revision_id):
+    """Return the `StackGraph` of the stack containing a revision.
+
+    Raises:
+        RevisionNotFound: If Lando API doesn't know the revision.
+    """
+    try:
+        stack = api.request("GET", "stacks/D{}".format(revision_id))
+    except LandoAPIError as e:
+        if e.status_code == 404:
+            raise RevisionNotFound(revision_id)
+        else:
+            raise
+
+    return StackGraph(stack)
+
+
+def landing_details(stack_graph, series):
+    """Return what is needed to land a series from `StackGraph.series()`.
+
+    Returns:
+        A tuple of the series in landing order, the landing path to send to
+        Lando API and the repository the series lands in.
+    """
+    revisions = stack_graph.revisions
+    landing_path = [
+        {
+            "revision_id": revisions[phid]["id"],
+            "diff_id": revisions[phid]["diff"]["id"],
+        }
+        for phid in series
+    ]
+    series = list(reversed(series))
+    target_repo = stack_graph.repositories.get(revisions[series[0]]["repo_phid"])
+    return series, landing_path, target_repo
+
+
 def annotate_sec_approval_workflow_info(revisions):
     """Annotate a dict of revisions with sec-approval workflow information.
 
@@ -71,10 +179,10 @@ def annotate_sec_approval_workflow_info(revisions):
 @revisions.route("/D<int:revision_id>/", methods=("GET", "POST"))
 @oidc_auth_optional
 def revision(revision_id):
-    api = LandoAPI(
-        current_app.config["LANDO_API_URL"],
-        auth0_access_token=session.get("access_token"),
+    api = get_lando_api(
         phabricator_api_token=get_phabricator_api_token(),
+        cache=stack_cache,
+        dryrun_cache=dryrun_cache,
     )
 
     form = TransplantRequestForm()
@@ -90,17 +198,21 @@ def revision(revision_id):
                 errors.extend(field_errors)
 
         else:
+            landing_path = json.loads(form.landing_path.data)
             try:
                 api.request(
                     "POST",
                     "transplants",
                     require_auth0=True,
                     json={
-                        "landing_path": json.loads(form.landing_path.data),
+                        "landing_path": landing_path,
                         "confirmation_token": form.confirmation_token.data,
                         "flags": json.loads(form.flags.data),
                     },
                 )
+                landed = [r["revision_id"] for r in landing_path]
+                api.invalidate_stacks(landed)
+                api.invalidate_dryruns(landed)
                 # We don't actually need any of the data from the
                 # the submission. As long as an exception wasn't
                 # raised we're successful.
@@ -111,85 +223,74 @@ def revision(revision_id):
 
                 errors.append(e.detail)
 
-    # Request the entire stack.
-    try:
-        stack = api.request("GET", "stacks/D{}".format(revision_id))
-    except LandoAPIError as e:
-        if e.status_code == 404:
-            raise RevisionNotFound(revision_id)
-        else:
-            raise
+    # Request all previous transplants for the stack in the background,
+    # they aren't needed until the page is rendered. Only the fields the
+    # timeline renders are kept while the response is parsed.
+    transplants = api.submit(
+        "GET",
+        "transplants",
+        params={"stack_revision_id": "D{}".format(revision_id)},
+        projection=transplant_projection(current_app.config["TRANSPLANT_OUTPUT_LIMIT"]),
+    )
 
-    # Build a mapping from phid to revision and identify
-    # the data for the revision used to load this page.
-    revision = None
-    revisions = {}
-    for r in stack["revisions"]:
-        revisions[r["phid"]] = r
-        if r["id"] == "D{}".format(revision_id):
-            revision = r["phid"]
-
-    # Build a mapping from phid to repository.
-    repositories = {}
-    for r in stack["repositories"]:
-        repositories[r["phid"]] = r
-
-    # Request all previous transplants for the stack.
-    transplants = api.request(
-        "GET", "transplants", params={"stack_revision_id": "D{}".format(revision_id)}
+    context = dict(
+        revision_id="D{}".format(revision_id),
+        timeline_url=url_for("revisions.timeline", revision_id=revision_id),
+        landing_preview_url=url_for(
+            "revisions.landing_preview", revision_id=revision_id
+        ),
+        sec_approval_form=sec_approval_form,
+        errors=errors,
+        form=form,
     )
 
-    # The revision may appear in many `landable_paths`` if it has
-    # multiple children, or any of its landable descendents have
-    # multiple children. That being said, there should only be a
-    # single unique path up to this revision, so find the first
-    # it appears in. The revisions up to the target one in this
-    # path form the landable series.
-    #
-    # We also form a set of all the revisions that are landable
-    # so we can present selection for what to land.
-    series = None
-    landable = set()
-    for p in stack["landable_paths"]:
-        for phid in p:
-            landable.add(phid)
-
-        try:
-            series = p[: p.index(revision) + 1]
-        except ValueError:
-            pass
+    def load_stack():
+        return stack_page_context(api, revision_id, form, transplants)
 
-    dryrun = None
+    if current_app.config["STREAM_STACK_PAGE"]:
+        # Send the layout straight away and the rest of the page once the
+        # stack has been fetched.
+        return Response(
+            stream_template("stack/stack.html", deferred=load_stack, **context)
+        )
+
+    return render_template("stack/stack.html", **context, **load_stack())
+
+
+def stack_page_context(api, revision_id, form, transplants):
+    """Fetch the stack of a revision and return the stack page's context.
+
+    Args:
+        api: The `LandoAPI` client of the page's request.
+        revision_id: The id of the page's revision, as an int.
+        form: The page's `TransplantRequestForm`. Its landing path is set.
+        transplants: A `Future` of the transplants of the stack.
+    """
+    stack_graph = get_stack_graph(api, revision_id)
+    revisions = stack_graph.revisions
+    revision = stack_graph.phid("D{}".format(revision_id))
+    series = stack_graph.series(revision)
+
+    # The dryrun is left to `landing_preview`, which the page requests
+    # when the landing preview is opened.
     target_repo = None
     if series and is_user_authenticated():
-        landing_path = [
-            {
-                "revision_id": revisions[phid]["id"],
-                "diff_id": revisions[phid]["diff"]["id"],
-            }
-            for phid in series
-        ]
+        series, landing_path, target_repo = landing_details(stack_graph, series)
         form.landing_path.data = json.dumps(landing_path)
 
-        dryrun = api.request(
-            "POST",
-            "transplants/dryrun",
-            require_auth0=True,
-            json={"landing_path": landing_path},
-        )
-        form.confirmation_token.data = dryrun.get("confirmation_token")
+    order = stack_graph.order
+    drawing_width, drawing_rows = stack_graph.drawing
+    rows = list(zip(reversed(order), reversed(drawing_rows)))
 
-        series = list(reversed(series))
-        target_repo = repositories.get(revisions[series[0]]["repo_phid"])
+    # Large stacks are drawn on a canvas on the client from a packed copy
+    # of the drawing, rather than as SVG on every row.
+    packed_drawing = None
+    canvas_min_rows = current_app.config["STACK_GRAPH_CANVAS_MIN_ROWS"]
+    if canvas_min_rows and len(rows) >= canvas_min_rows:
+        packed_drawing = pack_drawing(row for _, row in rows)
 
-    phids = set(revisions.keys())
-    edges = set(Edge(child=e[0], parent=e[1]) for e in stack["edges"])
-    order = sort_stack_topological(
-        phids, edges, key=lambda x: int(revisions[x]["id"][1:])
-    )
-    drawing_width, drawing_rows = draw_stack_graph(phids, edges, order)
-
-    annotate_sec_approval_workflow_info(revisions)
+    transplants = transplants.result()
+    prepare_timeline(transplants, revision_id)
 
     # Are we showing the "sec-approval request submitted" dialog?
     # If we are then fill in its values.
@@ -201,6 +302,57 @@ def revision(revision_id):
                 submitted_rev_url = rev["url"]
                 break
 
+    return dict(
+        series=series,
+        landable=stack_graph.landable,
+        stack=stack_graph.stack,
+        rows=rows,
+        drawing_width=drawing_width,
+        packed_drawing=packed_drawing,
+        transplants=transplants,
+        revisions=revisions,
+        revision_phid=revision,
+        submitted_rev_url=submitted_rev_url,
+        target_repo=target_repo,
+    )
+
+
+@revisions.route("/D<int:revision_id>/landing-preview")
+def landing_preview(revision_id):
+    """Run a landing dryrun for a revision and render the landing preview.
+
+    The stack page doesn't run the dryrun, which is the most expensive
+    request to Lando API, it loads the landing preview from here when the
+    user opens it.
+
+    Returns:
+        JSON with the rendered `html` of the preview, and the `landing_path`
+        and `confirmation_token` to submit with the landing form.
+    """
+    if not is_user_authenticated():
+        errors = make_form_error("You must be logged in to preview a landing.")
+        return jsonify(errors=errors), 401
+
+    api = get_lando_api(
+        phabricator_api_token=get_phabricator_api_token(),
+        cache=stack_cache,
+        dryrun_cache=dryrun_cache,
+    )
+    stack_graph = get_stack_graph(api, revision_id)
+    revisions = stack_graph.revisions
+    series = stack_graph.series(stack_graph.phid("D{}".format(revision_id)))
+
+    dryrun = None
+    landing_path = None
+    target_repo = None
+    if series:
+        series, landing_path, target_repo = landing_details(stack_graph, series)
+        dryrun = api.dryrun(
+            landing_path, target_repo=target_repo["phid"] if target_repo else None
+        )
+
+    annotate_sec_approval_workflow_info(revisions)
+
     # Current implementation requires that all commits have the flags appended.
     # This may change in the future. What we do here is:
     # - if all commits have the flag, then disable the checkbox
@@ -215,26 +367,87 @@ def revision(revision_id):
     else:
         existing_flags = {}
 
-    return render_template(
-        "stack/stack.html",
-        revision_id="D{}".format(revision_id),
-        series=series,
-        landable=landable,
+    html = render_template(
+        "stack/partials/landing-preview.html",
         dryrun=dryrun,
-        stack=stack,
-        rows=list(zip(reversed(order), reversed(drawing_rows))),
-        drawing_width=drawing_width,
-        transplants=transplants,
+        series=series,
         revisions=revisions,
-        revision_phid=revision,
-        sec_approval_form=sec_approval_form,
-        submitted_rev_url=submitted_rev_url,
         target_repo=target_repo,
-        errors=errors,
-        form=form,
+        sec_approval_form=SecApprovalRequestForm(),
         flags=target_repo["commit_flags"] if target_repo else [],
         existing_flags=existing_flags,
     )
+    return jsonify(
+        html=html,
+        landing_path=json.dumps(landing_path) if landing_path else None,
+        confirmation_token=dryrun.get("confirmation_token") if dryrun else None,
+    )
+
+
+@revisions.route("/D<int:revision_id>/timeline")
+@oidc_auth_optional
+def timeline(revision_id):
+    """Render the landing timeline of a stack on its own.
+
+    The stack page refreshes its timeline from here after a landing job is
+    cancelled, which avoids fetching the stack and a new dryrun again.
+    """
+    api = get_lando_api(phabricator_api_token=get_phabricator_api_token())
+    transplants = api.request(
+        "GET",
+        "transplants",
+        params={"stack_revision_id": "D{}".format(revision_id)},
+        projection=transplant_projection(current_app.config["TRANSPLANT_OUTPUT_LIMIT"]),
+    )
+    prepare_timeline(transplants, revision_id)
+
+    return render_template(
+        "stack/partials/timeline.html",
+        transplants=transplants,
+        timeline_url=url_for("revisions.timeline", revision_id=revision_id),
+    )
+
+
+@revisions.route("/D<int:revision_id>/transplants/<int:transplant_id>/output")
+@oidc_auth_optional
+def transplant_output(revision_id, transplant_id):
+    """Return the raw error output of a transplant as plain text.
+
+    If a `path` is given the rejected hunk for that file is returned
+    instead. The stack page only includes the start of these, the timeline
+    loads the rest from here when they are expanded.
+    """
+    path = request.args.get("path")
+    if path is None:
+        projection = {"id": True, "details": True}
+    else:
+        projection = {
+            "id": True,
+            "error_breakdown": {"reject_paths": {path: {"content": True}}},
+        }
+
+    api = get_lando_api(phabricator_api_token=get_phabricator_api_token())
+    transplants = api.request(
+        "GET",
+        "transplants",
+        params={"stack_revision_id": "D{}".format(revision_id)},
+        projection=projection,
+    )
+
+    transplant = next((t for t in transplants if t.get("id") == transplant_id), None)
+    if transplant is None:
+        abort(404)
+
+    if path is None:
+        output = transplant.get("details")
+    else:
+        reject_paths = (transplant.get("error_breakdown") or {}).get("reject_paths")
+        output = (reject_paths or {}).get(path, {}).get("content")
+
+    if output is None:
+        abort(404)
+
+    return Response(output, mimetype="text/plain")
 
 
 @revisions.route("/revisions/D<int:revision_id>/<diff_id>/", methods=("GET", "POST"))
@@ -263,11 +476,7 @@ def sec_approval_request_handler():
         )
         return jsonify(errors=errors), 400
 
-    api = LandoAPI(
-        current_app.config["LANDO_API_URL"],
-        auth0_access_token=session.get("access_token"),
-        phabricator_api_token=token,
-    )
+    api = get_lando_api(phabricator_api_token=token)
 
     form = SecApprovalRequestForm()
 
@@ -301,10 +510,8 @@ def update_landing_job(landing_job_id):
         return jsonify(errors=errors), 401
 
     token = get_phabricator_api_token()
-    api = LandoAPI(
-        current_app.config["LANDO_API_URL"],
-        auth0_access_token=session.get("access_token"),
-        phabricator_api_token=token,
+    api = get_lando_api(
+        phabricator_api_token=token, cache=stack_cache, dryrun_cache=dryrun_cache
     )
 
     try:
@@ -316,6 +523,11 @@ def update_landing_job(landing_job_id):
         )
     except LandoAPIError as e:
         return e.response, e.response["status"]
+
+    # We can't tell which stack the landing job belongs to, so drop all
+    # of the stacks and dryruns this user has cached.
+    api.invalidate_stacks()
+    api.invalidate_dryruns()
     return data
 
 
@@ -2,8 +2,10 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import heapq
+import itertools
+import sys
 from collections import namedtuple
-from types import SimpleNamespace
 
 Edge = namedtuple("Edge", ("child", "parent"))
 Node = namedtuple("Node", ("id", "children", "parents"))
@@ -55,23 +57,30 @@ def sort_stack_topological(nodes, edges, *, key=lambda x: x):
     Raises:
         ValueError: If the provided stack contains a cycle.
     """
-    g = graph(nodes, edges)
+    return _sort_graph(graph(nodes, edges), key)
 
-    sources = {node for node in g if not g[node].parents}
+
+def _sort_graph(g, key):
+    # `key` is only called once per node. The counter breaks ties between
+    # equal keys without ever comparing node identifiers themselves.
+    keys = {node: key(node) for node in g}
+    counter = itertools.count()
+    remaining = {node: len(g[node].parents) for node in g}
+    sources = [(keys[node], next(counter), node) for node in g if not remaining[node]]
+    heapq.heapify(sources)
     order = []
 
     while sources:
-        node = min(sources, key=key)
-        sources.remove(node)
+        node = heapq.heappop(sources)[2]
         order.append(node)
 
-        for child in g.pop(node).children:
-            g[child].parents.remove(node)
+        for child in g[node].children:
+            remaining[child] -= 1
 
-            if not g[child].parents:
-                sources.add(child)
+            if not remaining[child]:
+                heapq.heappush(sources, (keys[child], next(counter), child))
 
-    if g:
+    if len(order) != len(g):
         raise ValueError("Provided graph has a cycle.")
 
     return order
@@ -102,61 +111,241 @@ def draw_stack_graph(nodes, edges, order):
           - 'other': A list of columns which should connect vertically
                      from top to bottom.
     """
-    g = graph(nodes, edges)
+    return _draw_graph(graph(nodes, edges), order)
+
+
+def _draw_graph(g, order):
+    pos = {node: i for i, node in enumerate(order)}
+
+    # The node each column is currently heading towards, or None if the
+    # column is free, and the inverse mapping of node to columns.
     next_node = []
-    drawing = SimpleNamespace(rows=[], width=0)
+    columns = {}
+
+    # Free columns, as a min-heap with lazy deletion: an entry is only
+    # valid while its column is still in `free`.
+    free = set()
+    free_heap = []
 
     def empty_column_or_new():
-        """Return the index of an empty column or create a new one."""
-        if not next_node.count(None):
-            next_node.append(None)
-            drawing.width += 1
-            return drawing.width - 1
+        """Return the index of the lowest empty column, creating one if needed."""
+        while free_heap and free_heap[0] not in free:
+            heapq.heappop(free_heap)
 
-        return next_node.index(None)
+        if free_heap:
+            return free_heap[0]
 
-    # Iterate over the order and build the drawing.
-    for i, node in enumerate(order):
-        # What column should this node go in?
-        col = next_node.index(node) if next_node.count(node) else empty_column_or_new()
+        next_node.append(None)
+        column = len(next_node) - 1
+        free.add(column)
+        heapq.heappush(free_heap, column)
+        return column
+
+    def connect(column, target):
+        next_node[column] = target
+        free.discard(column)
+        columns.setdefault(target, set()).add(column)
+
+    rows = []
 
-        # Calculate connections from earlier rows.
-        below = set()
-        for from_col in range(len(next_node)):
-            target = next_node[from_col]
-            if target == node:
-                below.add(from_col)
+    # Iterate over the order and build the drawing.
+    for node in order:
+        # Calculate connections from earlier rows. Every column heading
+        # towards this node is connected, and so is now free.
+        below = sorted(columns.pop(node, ()))
+        for column in below:
+            next_node[column] = None
+            free.add(column)
+            heapq.heappush(free_heap, column)
 
-                # Because we've connected this column it should
-                # now be free.
-                next_node[from_col] = None
+        # What column should this node go in?
+        col = below[0] if below else empty_column_or_new()
 
         # What columns need to connect vertically to continue?
-        other = {i for i, target in enumerate(next_node) if target is not None}
+        other = [i for i, target in enumerate(next_node) if target is not None]
 
         # Order the children for placement.
-        above = set()
+        above = []
         if g[node].children:
             # Place the closest child in the order above
             # the current node.
-            closest = order[min([order.index(child) for child in g[node].children])]
-            next_node[col] = closest
-            above.add(col)
+            closest = min(g[node].children, key=pos.__getitem__)
+            connect(col, closest)
+            above.append(col)
 
             for child in g[node].children:
                 if child != closest:
                     position = empty_column_or_new()
-                    next_node[position] = child
-                    above.add(position)
+                    connect(position, child)
+                    above.append(position)
 
-        drawing.rows.append(
+        rows.append(
             {
                 "node": node,
                 "pos": col,
                 "above": sorted(above),
-                "below": sorted(below),
-                "other": sorted(other),
+                "below": below,
+                "other": other,
             }
         )
 
-    return drawing.width, drawing.rows
+    return len(next_node), rows
+
+
+def pack_drawing(rows):
+    """Pack drawing rows into a compact string for drawing on the client.
+
+    Each row is encoded as a run of integers: the node's column, the number
+    of columns connecting above followed by those columns, the same for
+    below, and then the number of vertical ranges followed by a (start,
+    length) pair for each range of consecutive columns in 'other'.
+
+    Args:
+        rows: An iterable of rows from `draw_stack_graph()`.
+
+    Returns:
+        The integers of every row, in order, separated by commas.
+    """
+    packed = []
+    for row in rows:
+        packed.append(row["pos"])
+        packed.append(len(row["above"]))
+        packed.extend(row["above"])
+        packed.append(len(row["below"]))
+        packed.extend(row["below"])
+
+        ranges = []
+        for col in row["other"]:
+            if ranges and ranges[-1][0] + ranges[-1][1] == col:
+                ranges[-1][1] += 1
+            else:
+                ranges.append([col, 1])
+        packed.append(len(ranges))
+        for start, length in ranges:
+            packed.extend((start, length))
+
+    return ",".join(map(str, packed))
+
+
+class StackGraph:
+    """A stack returned by Lando API, with everything derived from it.
+
+    Built once from a `GET /stacks/D<id>` response. The graph, its
+    topological order and drawing, the landable revisions and each
+    revision's landable series are computed when first used and then
+    reused. PHIDs are interned so the many sets and dicts keyed by them
+    share a single copy of each string.
+
+    Attributes:
+        stack: The decoded stack response.
+        revisions: A dict mapping revision PHIDs to revision data.
+    """
+
+    __slots__ = (
+        "stack",
+        "revisions",
+        "_ids",
+        "_repositories",
+        "_edges",
+        "_graph",
+        "_order",
+        "_drawing",
+        "_landable",
+        "_series",
+    )
+
+    def __init__(self, stack):
+        self.stack = stack
+        self.revisions = {}
+        self._ids = {}
+        for revision in stack["revisions"]:
+            phid = revision["phid"] = sys.intern(revision["phid"])
+            self.revisions[phid] = revision
+            self._ids[revision["id"]] = phid
+
+        self._repositories = None
+        self._edges = None
+        self._graph = None
+        self._order = None
+        self._drawing = None
+        self._landable = None
+        self._series = None
+
+    def phid(self, revision_id):
+        """Return the PHID of a revision given its id ("D123"), or None."""
+        return self._ids.get(revision_id)
+
+    @property
+    def repositories(self):
+        """A dict mapping repository PHIDs to repository data."""
+        if self._repositories is None:
+            self._repositories = {
+                sys.intern(r["phid"]): r for r in self.stack["repositories"]
+            }
+        return self._repositories
+
+    @property
+    def edges(self):
+        """A set of the Edge objects between revisions."""
+        if self._edges is None:
+            self._edges = {
+                Edge(child=sys.intern(child), parent=sys.intern(parent))
+                for child, parent in self.stack["edges"]
+            }
+        return self._edges
+
+    @property
+    def graph(self):
+        """A dict mapping revision PHIDs to Node objects, see `graph()`."""
+        if self._graph is None:
+            self._graph = graph(set(self.revisions), self.edges)
+        return self._graph
+
+    @property
+    def order(self):
+        """Revision PHIDs in topological order, ties broken by revision id."""
+        if self._order is None:
+            revisions = self.revisions
+            self._order = _sort_graph(
+                self.graph, lambda phid: int(revisions[phid]["id"][1:])
+            )
+        return self._order
+
+    @property
+    def drawing(self):
+        """The (width, rows) drawing of the stack, see `draw_stack_graph()`."""
+        if self._drawing is None:
+            self._drawing = _draw_graph(self.graph, self.order)
+        return self._drawing
+
+    @property
+    def landable(self):
+        """A set of the PHIDs of every revision in a landable path."""
+        if self._landable is None:
+            self._landable = {
+                sys.intern(phid)
+                for path in self.stack["landable_paths"]
+                for phid in path
+            }
+        return self._landable
+
+    def series(self, phid):
+        """Return the landable series ending at a revision, or None.
+
+        A revision may appear in many landable paths if it has multiple
+        children, or any of its landable descendents have multiple
+        children, but there is only a single unique path up to it. The
+        revisions up to it in the last path it appears in form the series.
+        """
+        if self._series is None:
+            # The path and position of the last appearance of each revision.
+            self._series = {}
+            for path in self.stack["landable_paths"]:
+                for i, revision in enumerate(path):
+                    self._series[revision] = (path, i)
+
+        if phid not in self._series:
+            return None
+
+        path, i = self._series[phid]
+        return path[: i + 1]
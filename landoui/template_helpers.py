@@ -2,14 +2,17 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 import datetime
+import functools
+import itertools
 import logging
 import re
 import urllib.parse
 
-from flask import Blueprint, current_app, escape
+from flask import Blueprint, current_app, escape, Markup
 from landoui.forms import UserSettingsForm
 
 from landoui import helpers
+from landoui.jsoncodec import Truncated
 
 FAQ_URL = "https://wiki.mozilla.org/Phabricator/FAQ#Lando"
 SEC_BUG_DOCS = "https://firefox-source-docs.mozilla.org/bug-mgmt/processes/security-approval.html"  # noqa: E501
@@ -179,6 +182,14 @@ def linkify_transplant_details(text, transplant):
     return re.sub(search, replace, str(text))  # This is case sensitive
 
 
+@template_helpers.app_template_filter()
+def truncation_note(text):
+    """Return a note saying how much of a truncated string isn't shown."""
+    if not isinstance(text, Truncated):
+        return ""
+    return "\n[{} more characters not shown]".format(text.length - len(text))
+
+
 @template_helpers.app_template_filter()
 def linkify_faq(text):
     search = r"\b(FAQ)\b"
@@ -193,6 +204,76 @@ def linkify_sec_bug_docs(text):
     return re.sub(search, replace, str(text), flags=re.IGNORECASE)
 
 
+LINKIFY_KINDS = ("bugs", "revisions", "faq", "sec_docs")
+
+
+@functools.lru_cache(maxsize=32)
+def _linkify_pattern(phabricator_url, kinds):
+    """Return one compiled pattern matching every kind of reference in `kinds`.
+
+    Each alternative is a named group, so the match's `lastgroup` is the
+    kind of reference which matched.
+    """
+    patterns = {
+        "bugs": r"(?=\b)(?P<bugs>Bug (?P<bug_id>\d+))(?=\b)",
+        "revisions": (
+            r"(?=\b)(?P<revisions>" + re.escape(phabricator_url) + r"/D\d+)(?=\b)"
+        ),
+        "faq": r"\b(?P<faq>FAQ)\b",
+        "sec_docs": r"\b(?P<sec_docs>Security Bug Approval Process)\b",
+    }
+    return re.compile("|".join(patterns[kind] for kind in kinds), flags=re.IGNORECASE)
+
+
+@template_helpers.app_template_filter()
+def linkify(text, *kinds):
+    """Escape `text` and link references in it to the pages they refer to.
+
+    Equivalent to chaining `escape_html` with the `linkify_bug_numbers`,
+    `linkify_revision_urls`, `linkify_faq` and `linkify_sec_bug_docs`
+    filters, but scans the text once with a pattern compiled once per
+    configuration.
+
+    Args:
+        text: The text to escape and linkify.
+        *kinds: The kinds of references to link, from `LINKIFY_KINDS`.
+            Defaults to all of them.
+    """
+    pattern = _linkify_pattern(
+        current_app.config["PHABRICATOR_URL"], kinds or LINKIFY_KINDS
+    )
+
+    # Text which is already markup is left as it is, like `escape_html`.
+    if hasattr(text, "__html__"):
+        text = text.__html__()
+        escape_text = str
+    else:
+        text = str(text)
+        escape_text = escape
+
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        matched = escape_text(match.group(0))
+        if match.lastgroup == "bugs":
+            href = "{}/show_bug.cgi?id={}".format(
+                current_app.config["BUGZILLA_URL"], match["bug_id"]
+            )
+        elif match.lastgroup == "revisions":
+            href = matched
+        elif match.lastgroup == "faq":
+            href = FAQ_URL
+        else:
+            href = SEC_BUG_DOCS
+
+        parts.append(escape_text(text[position : match.start()]))
+        parts.append('<a href="{}">{}</a>'.format(href, matched))
+        position = match.end()
+    parts.append(escape_text(text[position:]))
+
+    return Markup("".join(parts))
+
+
 @template_helpers.app_template_filter()
 def bug_url(text):
     return "{bmo_url}/show_bug.cgi?id={bug_number}".format(
@@ -254,8 +335,22 @@ def graph_height():
     return GRAPH_DRAWING_HEIGHT
 
 
+@template_helpers.app_template_global()
+def graph_colors():
+    return GRAPH_DRAWING_COLORS
+
+
+# x positions of the first columns, which are all most stacks ever use.
+GRAPH_DRAWING_X_POS = tuple(
+    (GRAPH_DRAWING_COL_WIDTH * col) + (GRAPH_DRAWING_COL_WIDTH / 2)
+    for col in range(256)
+)
+
+
 @template_helpers.app_template_filter()
 def graph_x_pos(col):
+    if 0 <= col < len(GRAPH_DRAWING_X_POS):
+        return GRAPH_DRAWING_X_POS[col]
     return (GRAPH_DRAWING_COL_WIDTH * col) + (GRAPH_DRAWING_COL_WIDTH / 2)
 
 
@@ -296,6 +391,108 @@ def graph_below_path(col, below):
     return " ".join(commands)
 
 
+@functools.lru_cache(maxsize=4096)
+def _graph_curve(from_col, to_col):
+    """Return the relative path commands for half a row from one column to another."""
+    dx = _svg_number(graph_x_pos(to_col) - graph_x_pos(from_col))
+    return "c0 {q} {dx} {q} {dx} {h}".format(
+        q=_svg_number(GRAPH_DRAWING_HEIGHT / 4),
+        dx=dx,
+        h=_svg_number(GRAPH_DRAWING_HEIGHT / 2),
+    )
+
+
+def _svg_number(value):
+    return "{:g}".format(value)
+
+
+@template_helpers.app_template_filter()
+def graph_svg(rows):
+    """Return a single SVG drawing of the graph for all of a stack's rows.
+
+    The drawing is placed in the SVG's `<defs>` as `#StackGraph`, with row
+    `i` occupying `i * graph_height()` to `(i + 1) * graph_height()`.
+    Each table row shows its part with a small SVG whose viewBox selects
+    that slice, so the drawing itself is only emitted once.
+
+    Args:
+        rows: A list of (node, row) pairs in display order, where each row
+            is a dictionary from `draw_stack_graph()`.
+    """
+    key = tuple(
+        (row["pos"], tuple(row["above"]), tuple(row["below"]), tuple(row["other"]))
+        for _, row in rows
+    )
+    return Markup(_render_graph_svg(key))
+
+
+@functools.lru_cache(maxsize=64)
+def _render_graph_svg(rows):
+    height = GRAPH_DRAWING_HEIGHT
+    # Elements are grouped by column colour so the stroke is set only once.
+    # Nodes are grouped separately and drawn after every line and curve, so
+    # strokes in other colours never paint over them.
+    groups = {}
+    nodes = {}
+
+    def add(col, element, into=groups):
+        into.setdefault(graph_color(col), []).append(element)
+
+    def curve(from_col, y, to_col):
+        return '<path d="M{x} {y}{c}"/>'.format(
+            x=_svg_number(graph_x_pos(from_col)),
+            y=_svg_number(y),
+            c=_graph_curve(from_col, to_col),
+        )
+
+    def line(col, start, end):
+        x = _svg_number(graph_x_pos(col))
+        add(
+            col,
+            '<line x1="{x}" x2="{x}" y1="{y1}" y2="{y2}"/>'.format(
+                x=x, y1=_svg_number(start * height), y2=_svg_number(end * height)
+            ),
+        )
+
+    # Vertical lines passing through consecutive rows are drawn as one.
+    runs = {}
+    for i, (pos, above, below, other) in enumerate(rows):
+        y = i * height
+        for col in [col for col in runs if col not in other]:
+            line(col, runs.pop(col), i)
+        for col in other:
+            runs.setdefault(col, i)
+
+        for target in above:
+            add(target, curve(target, y, pos))
+        for target in below:
+            add(target, curve(pos, y + height / 2, target))
+        add(
+            pos,
+            '<circle cx="{x}" cy="{y}" r="3" fill="{color}"/>'.format(
+                x=_svg_number(graph_x_pos(pos)),
+                y=_svg_number(y + height / 2),
+                color=graph_color(pos),
+            ),
+            nodes,
+        )
+
+    for col, start in runs.items():
+        line(col, start, len(rows))
+
+    return (
+        '<svg class="GraphDrawing-defs" width="0" height="0" version="1.1" '
+        'xmlns="http://www.w3.org/2000/svg" aria-hidden="true">'
+        '<defs><g id="StackGraph" fill="none" stroke-width="1">{}</g></defs>'
+        "</svg>"
+    ).format(
+        "".join(
+            '<g stroke="{}">{}</g>'.format(color, "".join(elements))
+            for color, elements in itertools.chain(groups.items(), nodes.items())
+        )
+    )
+
+
 @template_helpers.app_template_filter()
 def message_type_to_notification_class(flash_message_category):
     """Map a Flask flash message category to a Bulma notification CSS class.
@@ -30,7 +30,7 @@ setup(
     keywords="mozilla lando development",
     packages=find_packages(exclude=["tests"]),
     install_requires=[],
-    extras_require={},
+    extras_require={"brotli": ["brotli"], "ijson": ["ijson"], "orjson": ["orjson"]},
     entry_points={
         "flask.commands": [
             "assets = flask_assets:assets",
@@ -0,0 +1,179 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import gzip
+import json
+import mimetypes
+import os
+
+import click
+import pytest
+from flask.cli import FlaskGroup, ScriptInfo
+from webassets import Bundle
+
+from landoui import assets
+from landoui.app import create_app
+
+SCRIPT = "function lando() { return 'lando'; }\n" * 100
+
+
+@pytest.fixture
+def static_folder(app, tmpdir):
+    app.static_folder = tmpdir.strpath
+    tmpdir.join("script.js").write(SCRIPT)
+    return tmpdir
+
+
+@pytest.fixture
+def built(app, static_folder):
+    env = app.jinja_env.assets_environment
+    env.register("test_js", Bundle("script.js", output="build/test.%(version)s.js"))
+    with app.app_context():
+        paths = assets.build_bundles(env)
+    return [os.path.relpath(path, static_folder.strpath) for path in paths]
+
+
+def test_build_writes_fingerprinted_and_compressed_bundles(built, static_folder):
+    output = built[0]
+
+    assert assets.FINGERPRINT.search(output)
+    assert output + ".gz" in built
+    assert static_folder.join(output).read() == SCRIPT
+    assert gzip.decompress(static_folder.join(output + ".gz").read_binary()) == (
+        SCRIPT.encode()
+    )
+
+    manifest = json.loads(static_folder.join("build/manifest.json").read())
+    assert manifest == {"build/test.%(version)s.js": output.split(".")[1]}
+
+
+def test_build_writes_brotli_bundles(built, static_folder):
+    brotli = pytest.importorskip("brotli")
+    output = built[0]
+
+    assert output + ".br" in built
+    assert brotli.decompress(static_folder.join(output + ".br").read_binary()) == (
+        SCRIPT.encode()
+    )
+
+
+def test_build_command_not_shadowed_by_flask_assets(app):
+    cli = FlaskGroup()
+    ctx = click.Context(cli, obj=ScriptInfo(create_app=lambda: app))
+
+    command = cli.get_command(ctx, "lando-assets")
+
+    assert command is assets.assets
+    assert command.get_command(ctx, "build").callback.__module__ == assets.__name__
+
+
+def test_compress_skips_incompressible_files(tmpdir):
+    path = tmpdir.join("tiny.js")
+    path.write("a")
+
+    assert assets.compress(path.strpath) == []
+    assert not tmpdir.join("tiny.js.gz").exists()
+
+
+def test_build_writes_bundle_manifest(built, static_folder):
+    assert assets.BUNDLE_MANIFEST in built
+    assert json.loads(static_folder.join(assets.BUNDLE_MANIFEST).read()) == {
+        "test_js": built[0]
+    }
+
+
+def test_bundle_url_uses_manifest_version(app, built):
+    with app.test_request_context():
+        urls = app.jinja_env.from_string('{{ asset_urls("test_js")|join }}').render()
+
+    assert urls == "/static/" + built[0]
+
+
+def test_unregistered_bundle_has_no_urls(app):
+    with app.test_request_context():
+        assert app.jinja_env.globals["asset_urls"]("main_js") == []
+
+
+BUNDLES = {
+    "vendor_css": "build/vendor.0123abcd.min.css",
+    "main_css": "build/main.0123abcd.min.css",
+    "vendor_js": "build/vendor.0123abcd.min.js",
+    "main_js": "build/main.0123abcd.min.js",
+}
+
+
+def test_bundle_urls_from_manifest_only(
+    versionfile, docker_env_vars, api_url, monkeypatch
+):
+    def no_yaml(path):
+        raise AssertionError("assets.yml loaded")
+
+    monkeypatch.setenv("ASSETS_FROM_MANIFEST", "1")
+    monkeypatch.setattr(assets, "YAMLLoader", no_yaml)
+    monkeypatch.setattr(assets, "load_bundle_manifest", lambda static_folder: BUNDLES)
+    app = create_app(
+        version_path=versionfile.strpath,
+        secret_key="secret",
+        session_cookie_name="lando-ui",
+        session_cookie_domain="lando-ui.test:7777",
+        session_cookie_secure=False,
+        use_https=0,
+        enable_asset_pipeline=True,
+        lando_api_url=api_url,
+        debug=True,
+    )
+    env = app.jinja_env.assets_environment
+
+    rv = app.test_client().get("/nonexistent")
+
+    assert len(env) == 0
+    for output in BUNDLES.values():
+        assert '="/static/{}"'.format(output).encode() in rv.data
+
+
+def test_bundle_manifest_required(app, static_folder):
+    app.config["ASSETS_FROM_MANIFEST"] = True
+
+    with pytest.raises(FileNotFoundError):
+        assets.init_app(app, False)
+
+
+def test_build_file_served_precompressed(client, built):
+    rv = client.get("/static/" + built[0], headers={"Accept-Encoding": "gzip"})
+
+    assert rv.status_code == 200
+    assert rv.headers["Content-Encoding"] == "gzip"
+    assert rv.headers["Cache-Control"] == assets.IMMUTABLE_CACHE_CONTROL
+    assert rv.headers["Vary"] == "Accept-Encoding"
+    assert rv.mimetype == mimetypes.guess_type(built[0])[0]
+    assert gzip.decompress(rv.data) == SCRIPT.encode()
+
+
+def test_build_file_served_uncompressed(client, built):
+    rv = client.get("/static/" + built[0], headers={"Accept-Encoding": "identity"})
+
+    assert rv.status_code == 200
+    assert "Content-Encoding" not in rv.headers
+    assert rv.headers["Cache-Control"] == assets.IMMUTABLE_CACHE_CONTROL
+    assert rv.get_data(as_text=True) == SCRIPT
+
+
+def test_build_file_prefers_brotli(client, built, static_folder):
+    static_folder.join(built[0] + ".br").write_binary(b"brotli")
+
+    rv = client.get("/static/" + built[0], headers={"Accept-Encoding": "gzip, br"})
+
+    assert rv.headers["Content-Encoding"] == "br"
+    assert rv.data == b"brotli"
+
+
+def test_unfingerprinted_build_file_not_immutable(client, built):
+    rv = client.get("/static/build/manifest.json")
+
+    assert rv.status_code == 200
+    assert rv.headers["Cache-Control"] != assets.IMMUTABLE_CACHE_CONTROL
+
+
+def test_build_file_not_found(client, static_folder):
+    assert client.get("/static/build/missing.0123abcd.js").status_code == 404
+    assert client.get("/static/build/../script.js").status_code == 404
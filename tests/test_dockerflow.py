@@ -18,12 +18,28 @@ def test_heartbeat_returns_200_if_lando_api_up(client, api_url):
         assert client.get("/__heartbeat__").status_code == 200
 
 
+def test_heartbeat_reports_circuit_states(client, api_url):
+    with requests_mock.mock() as m:
+        m.get(api_url + "/__lbheartbeat__", status_code=200)
+        response = client.get("/__heartbeat__")
+
+    assert "lando_api" in response.json["circuits"]
+
+
 def test_heartbeat_returns_502_if_lando_api_down(client, api_url):
     with requests_mock.mock() as m:
         m.get(api_url + "/__lbheartbeat__", exc=requests.ConnectionError)
         assert client.get("/__heartbeat__").status_code == 502
 
 
+def test_heartbeat_returns_502_if_lando_api_times_out(client, api_url):
+    with requests_mock.mock() as m:
+        m.get(api_url + "/__lbheartbeat__", exc=requests.ReadTimeout)
+        assert client.get("/__heartbeat__").status_code == 502
+
+    assert m.last_request.timeout is not None
+
+
 def test_dockerflow_version_endpoint_response(client):
     response = client.get("/__version__")
     assert response.status_code == 200
@@ -3,6 +3,7 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from landoui.errorhandlers import UIError, RevisionNotFound
+from landoui.landoapi import LandoAPIDeadlineExceeded
 
 
 def test_unknown_route_shows_default_404_page(client):
@@ -36,6 +37,16 @@ def test_ui_error_shows_uierror_page(app, client):
     assert b"This error must be in the test error page" in response.get_data()
 
 
+def test_deadline_exceeded_shows_try_again_page(app, client):
+    @app.route("/_tests/slow_route")
+    def slow_route():
+        raise LandoAPIDeadlineExceeded("Deadline exceeded")
+
+    response = client.get("/_tests/slow_route")
+    assert response.status_code == 504
+    assert b"try your request again" in response.get_data()
+
+
 def test_unexpected_error_shows_default_500_page(app, client):
     # Disable the TESTING and DEBUG flags to allow exceptions to propagate
     # up to the flask error handlers.
@@ -0,0 +1,202 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import datetime
+import io
+import json
+import uuid
+
+import pytest
+from flask import jsonify, request
+
+from landoui import jsoncodec
+from landoui.landoapi import LandoAPI, LandoAPICommunicationException
+
+PAYLOAD = {
+    "revisions": [
+        {"id": "D1", "phid": "PHID-DREV-1", "title": "Bug 1 - ünïcode ✓"},
+        {"id": "D2", "phid": "PHID-DREV-2", "title": "Bug 2", "flags": [1, 2.5]},
+    ],
+    "edges": [["PHID-DREV-2", "PHID-DREV-1"]],
+    "landable_paths": [],
+    "blocked": None,
+    "secure": False,
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def json_codec(request):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    previous = jsoncodec.codec
+    yield jsoncodec.configure(request.param)
+    jsoncodec.codec = previous
+
+
+def test_unknown_codec_rejected():
+    with pytest.raises(ValueError):
+        jsoncodec.configure("simplejson")
+
+
+def test_orjson_requested_but_missing_falls_back(monkeypatch):
+    monkeypatch.setattr(jsoncodec, "orjson", None)
+    monkeypatch.setattr(jsoncodec, "codec", "stdlib")
+    assert jsoncodec.configure("orjson") == "stdlib"
+    assert jsoncodec.configure("auto") == "stdlib"
+
+
+def test_loads_and_dumps_round_trip(json_codec):
+    encoded = jsoncodec.dumps(PAYLOAD)
+    assert isinstance(encoded, str)
+    assert jsoncodec.loads(encoded) == PAYLOAD
+    assert jsoncodec.loads(encoded.encode("utf-8")) == PAYLOAD
+
+
+@pytest.mark.parametrize("content", [b"{", b"\xff\xfe", b""])
+def test_loads_raises_value_error(json_codec, content):
+    with pytest.raises(ValueError):
+        jsoncodec.loads(content)
+
+
+def test_lando_api_decodes_with_active_codec(json_codec, api_url, requests_mock):
+    requests_mock.get(api_url + "/stacks/D1", content=json.dumps(PAYLOAD).encode())
+    requests_mock.get(api_url + "/stacks/D2", content=b"<html>")
+    api = LandoAPI(api_url)
+
+    assert api.request("GET", "stacks/D1") == PAYLOAD
+    with pytest.raises(LandoAPICommunicationException):
+        api.request("GET", "stacks/D2")
+
+
+def test_jsonify_matches_stdlib_output(app, json_codec):
+    data = {
+        "b": PAYLOAD,
+        "a": datetime.datetime(2021, 3, 4, 5, 6, 7),
+        "c": uuid.UUID("12345678123456781234567812345678"),
+    }
+    with app.test_request_context():
+        decoded = json.loads(jsonify(data).get_data())
+
+    assert decoded["a"] == "Thu, 04 Mar 2021 05:06:07 GMT"
+    assert decoded["b"] == PAYLOAD
+    assert decoded["c"] == "12345678-1234-5678-1234-567812345678"
+
+
+@pytest.mark.parametrize("data", [{1: "a"}, {"n": 2 ** 70}])
+def test_jsonify_falls_back_for_documents_orjson_rejects(app, json_codec, data):
+    with app.test_request_context():
+        encoded = jsonify(data).get_data()
+
+    assert json.loads(encoded) == json.loads(json.dumps(data))
+
+
+def test_jsonify_unserializable_raises_type_error(app, json_codec):
+    with app.test_request_context(), pytest.raises(TypeError):
+        jsonify({"x": object()})
+
+
+def test_request_json_decoding(app, json_codec):
+    with app.test_request_context(method="POST", json=PAYLOAD):
+        assert request.get_json() == PAYLOAD
+
+    with app.test_request_context(
+        method="POST", data="{", content_type="application/json"
+    ):
+        assert request.get_json(silent=True) is None
+
+
+TRANSPLANTS = [
+    {
+        "id": 1,
+        "status": "FAILED",
+        "details": "x" * 100,
+        "landing_path": [{"revision_id": "D1", "diff_id": 2, "extra": "drop"}],
+        "error_breakdown": {
+            "revision_id": 1,
+            "failed_paths": [{"path": "a.txt", "url": "u", "changeset_id": "c"}],
+            "reject_paths": {
+                "a.txt": {"path": "a.txt", "content": "@@ conflict\n" * 10},
+                "b.txt": {"path": "b.txt", "content": "short"},
+            },
+        },
+        "tree": "mozilla-central",
+    },
+    {"id": 2, "status": "LANDED", "details": "abc", "error_breakdown": None},
+    {"id": 3, "status": "LANDED", "details": None, "ratio": 1.5, "ok": True},
+]
+
+TRANSPLANT_SPEC = {
+    "id": True,
+    "status": True,
+    "details": 10,
+    "ratio": True,
+    "ok": True,
+    "landing_path": {"revision_id": True, "diff_id": True},
+    "error_breakdown": {
+        "revision_id": True,
+        "failed_paths": True,
+        "reject_paths": {"*": {"path": True, "content": 12}},
+    },
+}
+
+
+@pytest.fixture(params=["ijson", "fallback"])
+def projection_parser(request, monkeypatch):
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(jsoncodec, "ijson", None)
+    return request.param
+
+
+def test_project_selects_and_truncates():
+    projected = jsoncodec.project(TRANSPLANTS, TRANSPLANT_SPEC)
+
+    assert [t["id"] for t in projected] == [1, 2, 3]
+    assert "tree" not in projected[0]
+    assert projected[0]["landing_path"] == [{"revision_id": "D1", "diff_id": 2}]
+    assert projected[0]["details"] == "x" * 10
+    assert projected[0]["details"].truncated
+    assert projected[0]["details"].length == 100
+    reject_paths = projected[0]["error_breakdown"]["reject_paths"]
+    assert reject_paths["a.txt"]["content"] == "@@ conflict\n"
+    assert reject_paths["b.txt"]["content"] == "short"
+    assert not isinstance(reject_paths["b.txt"]["content"], jsoncodec.Truncated)
+    assert projected[1]["error_breakdown"] is None
+    assert projected[2]["details"] is None
+
+
+def test_project_true_keeps_everything():
+    assert jsoncodec.project(TRANSPLANTS, True) == TRANSPLANTS
+
+
+def test_load_projected_matches_project(projection_parser):
+    fp = io.BytesIO(json.dumps(TRANSPLANTS).encode("utf-8"))
+    expected = jsoncodec.project(TRANSPLANTS, TRANSPLANT_SPEC)
+
+    projected = jsoncodec.load_projected(fp, TRANSPLANT_SPEC)
+
+    assert projected == expected
+    assert type(projected[2]["ratio"]) is float
+    assert projected[0]["details"].length == 100
+
+
+@pytest.mark.parametrize("document", [b"[{", b"", b'{"a": 1} x'])
+def test_load_projected_invalid_json(projection_parser, document):
+    with pytest.raises(ValueError):
+        jsoncodec.load_projected(io.BytesIO(document), True)
+
+
+def test_iter_projected_matches_project(projection_parser):
+    fp = io.BytesIO(json.dumps(TRANSPLANTS).encode("utf-8"))
+
+    items = jsoncodec.iter_projected(fp, TRANSPLANT_SPEC)
+
+    assert next(items) == jsoncodec.project(TRANSPLANTS[0], TRANSPLANT_SPEC)
+    assert list(items) == jsoncodec.project(TRANSPLANTS[1:], TRANSPLANT_SPEC)
+
+
+@pytest.mark.parametrize("document", [b"[{}, {", b"", b"{}", b"[1] x"])
+def test_iter_projected_invalid_json(projection_parser, document):
+    with pytest.raises(ValueError):
+        list(jsoncodec.iter_projected(io.BytesIO(document), True))
@@ -1,14 +1,38 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import asyncio
+import email
+import http.server
+import json
+import threading
+import time
+import urllib.request
+from types import SimpleNamespace
+from unittest import mock
+
 import pytest
 import requests
 import requests_mock
 
 from landoui.landoapi import (
+    AsyncLandoAPI,
+    CircuitBreaker,
+    CircuitBreakers,
+    Deadline,
+    DEFAULT_TIMEOUTS,
+    endpoint_name,
+    executor,
+    get_timeout,
     LandoAPI,
+    LandoAPICircuitOpen,
     LandoAPIError,
     LandoAPICommunicationException,
+    LandoAPIDeadlineExceeded,
+    PooledTransport,
+    ResponseCache,
+    run_sync,
+    SingleFlight,
 )
 
 
@@ -102,3 +126,713 @@ def test_phabricator_api_token_in_request_header(api_url):
             api.request("GET", "stacks/D1")
 
         assert m.called
+
+
+def test_instances_share_pooled_session(api_url):
+    assert LandoAPI(api_url).session is LandoAPI(api_url).session
+
+
+def test_pooled_session_evicted_when_idle():
+    transport = PooledTransport(idle_timeout=0)
+    session = transport.session()
+    time.sleep(0.01)
+    assert transport.session() is not session
+
+
+def test_pooled_session_recreated_after_fork():
+    transport = PooledTransport()
+    session = transport.session()
+    transport._after_fork()
+    assert transport.session() is not session
+
+
+def test_pooled_session_does_not_keep_cookies(api_url):
+    class Response:
+        def info(self):
+            return email.message_from_string("Set-Cookie: user=someone; Path=/\n\n")
+
+    session = PooledTransport().session()
+    session.cookies.extract_cookies(
+        Response(), urllib.request.Request(api_url + "/stacks/D1")
+    )
+
+    assert not session.cookies
+
+
+def test_credentials_sent_per_request_on_shared_session(api_url):
+    first = LandoAPI(api_url, phabricator_api_token="first")
+    second = LandoAPI(api_url)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", text="{}")
+        first.request("GET", "stacks/D1")
+        second.request("GET", "stacks/D1")
+
+    assert m.request_history[0].headers["X-Phabricator-API-Key"] == "first"
+    assert "X-Phabricator-API-Key" not in m.request_history[1].headers
+    assert "X-Phabricator-API-Key" not in first.session.headers
+
+
+def test_submit_returns_decoded_response(api_url):
+    api = LandoAPI(api_url)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/transplants", json=[{"id": 1}])
+        future = api.submit("GET", "transplants", params={"stack_revision_id": "D1"})
+
+        assert future.result() == [{"id": 1}]
+        assert m.last_request.qs == {"stack_revision_id": ["d1"]}
+
+
+def test_submit_raises_same_exceptions_as_request(api_url):
+    api = LandoAPI(api_url)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", status_code=404, json={"detail": "Not found"})
+        future = api.submit("GET", "stacks/D1")
+
+        with pytest.raises(LandoAPIError) as exc_info:
+            future.result()
+
+    assert exc_info.value.status_code == 404
+
+
+@pytest.fixture
+def standin_api():
+    """A local HTTP server standing in for Lando API.
+
+    Every request is answered after a short delay with a JSON body
+    echoing the request path, or with an error for paths under /error.
+    """
+    delay = 0.2
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            if self.path.startswith("/error"):
+                status, body = 404, {"detail": "Not found", "status": 404}
+            else:
+                status, body = 200, {"path": self.path}
+
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield SimpleNamespace(
+        url="http://127.0.0.1:{}".format(server.server_port), delay=delay
+    )
+    server.shutdown()
+    server.server_close()
+
+
+def test_async_request_returns_decoded_response(standin_api):
+    api = AsyncLandoAPI(standin_api.url)
+    assert run_sync(api.request("GET", "stacks/D1")) == {"path": "/stacks/D1"}
+
+
+def test_async_requests_run_concurrently(standin_api):
+    api = AsyncLandoAPI(standin_api.url)
+
+    async def fetch():
+        return await asyncio.gather(
+            *(api.request("GET", "stacks/D{}".format(i)) for i in range(4))
+        )
+
+    start = time.monotonic()
+    results = run_sync(fetch())
+    elapsed = time.monotonic() - start
+
+    assert results == [{"path": "/stacks/D{}".format(i)} for i in range(4)]
+    assert elapsed < 3 * standin_api.delay
+
+
+def test_async_request_raises_lando_api_error(standin_api):
+    api = AsyncLandoAPI(standin_api.url)
+
+    with pytest.raises(LandoAPIError) as exc_info:
+        run_sync(api.request("GET", "error/D1"))
+
+    assert exc_info.value.status_code == 404
+    assert exc_info.value.detail == "Not found"
+
+
+def test_async_request_raises_communication_exception():
+    # Nothing listens on port 9 (discard) of the loopback interface.
+    api = AsyncLandoAPI("http://127.0.0.1:9")
+
+    with pytest.raises(LandoAPICommunicationException):
+        run_sync(api.request("GET", "stacks/D1"))
+
+
+def test_async_sync_facade_matches_request(standin_api):
+    api = AsyncLandoAPI(standin_api.url)
+    assert api.sync.request("GET", "stacks/D1") == {"path": "/stacks/D1"}
+
+
+STACK = {
+    "revisions": [
+        {"id": "D1", "phid": "PHID-DREV-1"},
+        {"id": "D2", "phid": "PHID-DREV-2"},
+    ],
+    "edges": [["PHID-DREV-2", "PHID-DREV-1"]],
+}
+
+
+def test_cached_stack_served_without_request(api_url):
+    api = LandoAPI(api_url, cache=ResponseCache())
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        first = api.request("GET", "stacks/D1")
+        first["revisions"].clear()
+        second = api.request("GET", "stacks/D1")
+
+    assert m.call_count == 1
+    assert second == STACK
+
+
+def test_cached_stack_keyed_by_identity(api_url):
+    cache = ResponseCache()
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        LandoAPI(api_url, cache=cache).request("GET", "stacks/D1")
+        LandoAPI(api_url, cache=cache, phabricator_api_token="token").request(
+            "GET", "stacks/D1"
+        )
+
+    assert m.call_count == 2
+
+
+def test_cached_stack_revalidated_with_etag(api_url):
+    api = LandoAPI(api_url, cache=ResponseCache(ttl=0))
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK, headers={"ETag": '"v1"'})
+        api.request("GET", "stacks/D1")
+
+        m.get(
+            api_url + "/stacks/D1",
+            status_code=304,
+            request_headers={"If-None-Match": '"v1"'},
+        )
+        assert api.request("GET", "stacks/D1") == STACK
+
+    assert m.call_count == 2
+
+
+def test_stack_cache_evicts_least_recently_used(api_url):
+    api = LandoAPI(api_url, cache=ResponseCache(max_entries=1))
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        m.get(api_url + "/stacks/D3", json={"revisions": []})
+        api.request("GET", "stacks/D1")
+        api.request("GET", "stacks/D3")
+        api.request("GET", "stacks/D1")
+
+    assert m.call_count == 3
+
+
+def test_stack_cache_does_not_store_errors(api_url):
+    api = LandoAPI(api_url, cache=ResponseCache())
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", status_code=500, json={})
+        with pytest.raises(LandoAPIError):
+            api.request("GET", "stacks/D1")
+
+        m.get(api_url + "/stacks/D1", json=STACK)
+        assert api.request("GET", "stacks/D1") == STACK
+
+
+@pytest.mark.parametrize(
+    "revision_ids, refetched",
+    [(None, True), (["D2"], True), (["PHID-DREV-1"], True), (["D9"], False)],
+)
+def test_invalidate_stacks(api_url, revision_ids, refetched):
+    api = LandoAPI(api_url, cache=ResponseCache())
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        api.request("GET", "stacks/D1")
+        api.invalidate_stacks(revision_ids)
+        api.request("GET", "stacks/D1")
+
+    assert m.call_count == (2 if refetched else 1)
+
+
+@pytest.mark.parametrize(
+    "revision_ids, refetched", [(None, False), (["D2"], True), (["D9"], False)]
+)
+def test_invalidate_stacks_for_every_identity(api_url, revision_ids, refetched):
+    cache = ResponseCache()
+    api = LandoAPI(api_url, auth0_access_token="token", cache=cache)
+    other = LandoAPI(api_url, auth0_access_token="other", cache=cache)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        api.request("GET", "stacks/D1")
+        other.invalidate_stacks(revision_ids)
+        api.request("GET", "stacks/D1")
+
+    assert m.call_count == (2 if refetched else 1)
+
+
+def test_cached_stack_shared_by_sibling_revisions(api_url):
+    api = LandoAPI(api_url, cache=ResponseCache())
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        api.request("GET", "stacks/D1")
+        assert api.request("GET", "stacks/D2") == STACK
+
+    assert m.call_count == 1
+
+
+def test_cached_sibling_revisions_invalidated_together(api_url):
+    api = LandoAPI(api_url, cache=ResponseCache())
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        m.get(api_url + "/stacks/D2", json=STACK)
+        api.request("GET", "stacks/D1")
+        api.invalidate_stacks(["D1"])
+        api.request("GET", "stacks/D2")
+
+    assert m.call_count == 2
+    assert api.cache.get(("stacks/D1", api.identity)) is not None
+
+
+@pytest.mark.parametrize(
+    "url_path, endpoint",
+    [
+        ("stacks/D123", "stacks"),
+        ("transplants", "transplants"),
+        ("transplants/dryrun", "transplants/dryrun"),
+        ("landing_jobs/5", "landing_jobs"),
+    ],
+)
+def test_endpoint_name(url_path, endpoint):
+    assert endpoint_name(url_path) == endpoint
+
+
+def test_request_uses_endpoint_timeouts(api_url):
+    timeouts = {"default": (1, 2), "transplants/dryrun": (3, 4)}
+    api = LandoAPI(api_url, timeouts=timeouts)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json={})
+        m.post(api_url + "/transplants/dryrun", json={})
+
+        api.request("GET", "stacks/D1")
+        assert m.last_request.timeout == (1, 2)
+
+        api.request("POST", "transplants/dryrun")
+        assert m.last_request.timeout == (3, 4)
+
+
+def test_request_timeouts_limited_by_deadline(api_url):
+    api = LandoAPI(api_url, deadline=Deadline(0.5))
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json={})
+        api.request("GET", "stacks/D1")
+
+    connect, read = m.last_request.timeout
+    assert 0 < connect <= 0.5
+    assert 0 < read <= 0.5
+
+
+def test_request_not_sent_after_deadline(api_url):
+    api = LandoAPI(api_url, deadline=Deadline(0))
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", json={})
+
+        with pytest.raises(LandoAPIDeadlineExceeded):
+            api.request("GET", "stacks/D1")
+
+        assert not m.called
+
+
+def test_timeout_after_deadline_raises_deadline_exceeded(api_url):
+    api = LandoAPI(api_url, deadline=Deadline(0.01))
+    with requests_mock.mock() as m:
+
+        def timeout(request, context):
+            time.sleep(0.02)
+            raise requests.ReadTimeout()
+
+        m.get(api_url + "/stacks/D1", text=timeout)
+
+        with pytest.raises(LandoAPIDeadlineExceeded):
+            api.request("GET", "stacks/D1")
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("landoui.landoapi.RETRY_BACKOFF", 0)
+
+
+def test_circuit_breaker_opens_on_failure_rate():
+    breaker = CircuitBreaker(min_requests=4, failure_rate=0.5, open_seconds=60)
+    for success in (True, False, True):
+        assert breaker.allow()
+        breaker.record(success=success)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    assert breaker.allow()
+    breaker.record(success=False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_circuit_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker(min_requests=1, open_seconds=0)
+    breaker.record(success=False)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record(success=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_circuit_breaker_reopens_when_trial_fails():
+    breaker = CircuitBreaker(min_requests=1, open_seconds=0)
+    breaker.record(success=False)
+    assert breaker.allow()
+
+    breaker.open_seconds = 60
+    breaker.record(success=False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_open_circuit_fails_without_request(api_url):
+    breakers = CircuitBreakers(min_requests=2, open_seconds=60)
+    api = LandoAPI(api_url, breakers=breakers)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", status_code=500, json={})
+        for _ in range(2):
+            with pytest.raises(LandoAPIError):
+                api.request("GET", "stacks/D1")
+
+        with pytest.raises(LandoAPICircuitOpen):
+            api.request("GET", "stacks/D2")
+
+    assert m.call_count == 2
+    assert breakers.states() == {"stacks": CircuitBreaker.OPEN}
+
+
+def test_unexpected_error_in_trial_request_recorded(api_url):
+    breakers = CircuitBreakers(min_requests=1, open_seconds=0)
+    api = LandoAPI(api_url, breakers=breakers)
+    with requests_mock.mock() as m:
+        m.get(
+            api_url + "/stacks/D1",
+            [
+                {"status_code": 500, "json": {}},
+                {"exc": ValueError("Invalid timeout")},
+                {"json": {"revisions": []}},
+            ],
+        )
+        with pytest.raises(LandoAPIError):
+            api.request("GET", "stacks/D1")
+        assert breakers.states() == {"stacks": CircuitBreaker.HALF_OPEN}
+
+        with pytest.raises(ValueError):
+            api.request("GET", "stacks/D1")
+
+        assert api.request("GET", "stacks/D1") == {"revisions": []}
+
+    assert breakers.states() == {"stacks": CircuitBreaker.CLOSED}
+
+
+def test_client_errors_do_not_open_circuit(api_url):
+    breakers = CircuitBreakers(min_requests=1)
+    api = LandoAPI(api_url, breakers=breakers)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", status_code=404, json={})
+        with pytest.raises(LandoAPIError):
+            api.request("GET", "stacks/D1")
+
+    assert breakers.states() == {"stacks": CircuitBreaker.CLOSED}
+
+
+def test_get_retried_on_unavailable(api_url, no_backoff):
+    api = LandoAPI(api_url, retries=2)
+    with requests_mock.mock() as m:
+        m.get(
+            api_url + "/stacks/D1",
+            [{"status_code": 503, "json": {}}, {"exc": requests.ConnectionError}]
+            + [{"json": {"revisions": []}}],
+        )
+        assert api.request("GET", "stacks/D1") == {"revisions": []}
+
+    assert m.call_count == 3
+
+
+def test_get_retries_are_bounded(api_url, no_backoff):
+    api = LandoAPI(api_url, retries=2)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", exc=requests.ConnectionError)
+        with pytest.raises(LandoAPICommunicationException):
+            api.request("GET", "stacks/D1")
+
+    assert m.call_count == 3
+
+
+def test_post_not_retried(api_url, no_backoff):
+    api = LandoAPI(api_url, retries=2)
+    with requests_mock.mock() as m:
+        m.post(api_url + "/transplants/dryrun", status_code=503, json={})
+        with pytest.raises(LandoAPIError):
+            api.request("POST", "transplants/dryrun")
+
+    assert m.call_count == 1
+
+
+def test_retry_not_made_past_deadline(api_url, monkeypatch):
+    monkeypatch.setattr("landoui.landoapi.random.uniform", lambda a, b: 1.0)
+    api = LandoAPI(api_url, retries=2, deadline=Deadline(0.5))
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", status_code=503, json={})
+        with pytest.raises(LandoAPIError):
+            api.request("GET", "stacks/D1")
+
+    assert m.call_count == 1
+
+
+def test_retry_not_made_after_backoff_overshoots_deadline(api_url, monkeypatch):
+    sleep = time.sleep
+    monkeypatch.setattr("landoui.landoapi.random.uniform", lambda a, b: 0.01)
+    monkeypatch.setattr("landoui.landoapi.time.sleep", lambda s: sleep(s + 0.1))
+    api = LandoAPI(api_url, retries=2, deadline=Deadline(0.05))
+    with requests_mock.mock() as m:
+        m.get(api_url + "/stacks/D1", status_code=503, json={})
+        with pytest.raises(LandoAPIDeadlineExceeded):
+            api.request("GET", "stacks/D1")
+
+    assert m.call_count == 1
+
+
+def test_timeout_not_computed_after_deadline():
+    with pytest.raises(LandoAPIDeadlineExceeded):
+        get_timeout(DEFAULT_TIMEOUTS, "stacks", Deadline(0))
+
+
+def test_single_flight_shares_concurrent_calls():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    leader = executor.submit(flight.do, "key", call)
+    started.wait(5)
+    followers = [executor.submit(flight.do, "key", call) for _ in range(3)]
+    time.sleep(0.05)
+    release.set()
+
+    assert leader.result() == "result"
+    assert [f.result() for f in followers] == ["result"] * 3
+    assert len(calls) == 1
+
+    # Once finished, the next call is made again.
+    flight.do("key", call)
+    assert len(calls) == 2
+
+
+def test_single_flight_shares_exceptions():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def call():
+        started.set()
+        release.wait(5)
+        raise LandoAPICommunicationException("failed")
+
+    leader = executor.submit(flight.do, "key", call)
+    started.wait(5)
+    follower = executor.submit(flight.do, "key", call)
+    time.sleep(0.05)
+    release.set()
+
+    for future in (leader, follower):
+        with pytest.raises(LandoAPICommunicationException):
+            future.result()
+
+
+def test_concurrent_identical_gets_coalesced(standin_api):
+    flight = SingleFlight()
+    api = LandoAPI(standin_api.url, single_flight=flight)
+    other = LandoAPI(
+        standin_api.url, single_flight=flight, phabricator_api_token="token"
+    )
+
+    with mock.patch.object(
+        api.session, "request", wraps=api.session.request
+    ) as request:
+        futures = [api.submit("GET", "stacks/D1") for _ in range(4)]
+        futures.append(other.submit("GET", "stacks/D1"))
+        results = [f.result() for f in futures]
+
+    assert results == [{"path": "/stacks/D1"}] * 5
+    results[0]["path"] = "modified"
+    assert results[1] == {"path": "/stacks/D1"}
+    assert request.call_count == 2
+
+
+def test_concurrent_projected_gets_coalesced(standin_api):
+    api = LandoAPI(standin_api.url, single_flight=SingleFlight())
+
+    with mock.patch.object(
+        api.session, "request", wraps=api.session.request
+    ) as request:
+        futures = [
+            api.submit("GET", "transplants", projection={"path": 4}) for _ in range(4)
+        ]
+        futures.append(api.submit("GET", "transplants", projection={"path": True}))
+        results = [f.result() for f in futures]
+
+    assert results == [{"path": "/tra"}] * 4 + [{"path": "/transplants"}]
+    assert results[0]["path"].length == len("/transplants")
+    assert results[0] is not results[1]
+    assert request.call_count == 2
+    assert all(call.kwargs["stream"] for call in request.call_args_list)
+
+
+def test_projected_request_streams_and_projects(api_url):
+    transplants = [
+        {"id": 1, "status": "FAILED", "details": "x" * 50, "tree": "central"},
+        {"id": 2, "status": "LANDED", "details": "abc", "tree": "central"},
+    ]
+    projection = {"id": True, "status": True, "details": 10}
+    with requests_mock.Mocker() as m:
+        m.get(api_url + "/transplants", json=transplants)
+        result = LandoAPI(api_url).request("GET", "transplants", projection=projection)
+
+    assert m.last_request.stream
+    assert result == [
+        {"id": 1, "status": "FAILED", "details": "x" * 10},
+        {"id": 2, "status": "LANDED", "details": "abc"},
+    ]
+    assert result[0]["details"].length == 50
+
+
+def test_projected_request_error_response(api_url):
+    with requests_mock.Mocker() as m:
+        m.get(
+            api_url + "/transplants",
+            status_code=400,
+            json={"detail": "Bad", "status": 400, "title": "Bad Request"},
+        )
+        with pytest.raises(LandoAPIError) as exc_info:
+            LandoAPI(api_url).request("GET", "transplants", projection={"id": True})
+
+    assert exc_info.value.detail == "Bad"
+
+
+def test_projected_request_invalid_json(api_url):
+    with requests_mock.Mocker() as m:
+        m.get(api_url + "/transplants", text="[{")
+        with pytest.raises(LandoAPICommunicationException):
+            LandoAPI(api_url).request("GET", "transplants", projection={"id": True})
+
+
+def test_projected_cached_request_keeps_full_response(api_url):
+    cache = ResponseCache()
+    api = LandoAPI(api_url, cache=cache)
+    with requests_mock.Mocker() as m:
+        m.get(api_url + "/stacks/D1", json=STACK)
+        projected = api.request("GET", "stacks/D1", projection={"edges": True})
+        full = api.request("GET", "stacks/D1")
+
+    assert projected == {"edges": STACK["edges"]}
+    assert full == STACK
+    assert m.call_count == 1
+
+
+LANDING_PATH = [
+    {"revision_id": "D1", "diff_id": 1},
+    {"revision_id": "D2", "diff_id": 3},
+]
+
+
+def test_dryrun_cached_by_landing_path(api_url):
+    api = LandoAPI(api_url, auth0_access_token="token", dryrun_cache=ResponseCache())
+    with requests_mock.mock() as m:
+        m.post(api_url + "/transplants/dryrun", json={"confirmation_token": "abc"})
+        first = api.dryrun(LANDING_PATH, target_repo="PHID-REPO-1")
+        first["confirmation_token"] = None
+        second = api.dryrun(LANDING_PATH, target_repo="PHID-REPO-1")
+        assert m.call_count == 1
+
+        api.dryrun(LANDING_PATH, target_repo="PHID-REPO-2")
+        api.dryrun(
+            [LANDING_PATH[0], {"revision_id": "D2", "diff_id": 4}],
+            target_repo="PHID-REPO-1",
+        )
+        LandoAPI(
+            api_url, auth0_access_token="other", dryrun_cache=api.dryrun_cache
+        ).dryrun(LANDING_PATH, target_repo="PHID-REPO-1")
+        assert m.call_count == 4
+
+    assert second == {"confirmation_token": "abc"}
+    assert m.request_history[0].json() == {"landing_path": LANDING_PATH}
+
+
+def test_dryrun_without_cache_always_requested(api_url):
+    api = LandoAPI(api_url, auth0_access_token="token")
+    with requests_mock.mock() as m:
+        m.post(api_url + "/transplants/dryrun", json={})
+        api.dryrun(LANDING_PATH)
+        api.dryrun(LANDING_PATH)
+
+    assert m.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "revision_ids, refetched", [(None, False), (["D2"], True), (["D9"], False)]
+)
+def test_invalidate_dryruns(api_url, revision_ids, refetched):
+    cache = ResponseCache()
+    api = LandoAPI(api_url, auth0_access_token="token", dryrun_cache=cache)
+    other = LandoAPI(api_url, auth0_access_token="other", dryrun_cache=cache)
+    with requests_mock.mock() as m:
+        m.post(api_url + "/transplants/dryrun", json={})
+        api.dryrun(LANDING_PATH)
+        other.invalidate_dryruns(revision_ids)
+        api.dryrun(LANDING_PATH)
+
+    assert m.call_count == (2 if refetched else 1)
+
+
+def test_iter_items_streams_projected_items(api_url):
+    api = LandoAPI(api_url)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/landing_queue", json=[{"id": 1, "x": 2}, {"id": 2}])
+        items = api.iter_items(
+            "landing_queue", params={"limit": 2}, projection={"id": True}
+        )
+        assert not m.called
+
+        assert list(items) == [{"id": 1}, {"id": 2}]
+
+    assert m.last_request.qs == {"limit": ["2"]}
+    assert m.last_request.headers["Content-Type"] == "application/json"
+
+
+def test_iter_items_errors(api_url):
+    api = LandoAPI(api_url)
+    with requests_mock.mock() as m:
+        m.get(api_url + "/landing_queue", status_code=404, json={"detail": "nope"})
+        with pytest.raises(LandoAPIError):
+            list(api.iter_items("landing_queue"))
+
+        m.get(api_url + "/landing_queue", content=b"[{}, ")
+        with pytest.raises(LandoAPICommunicationException):
+            list(api.iter_items("landing_queue"))
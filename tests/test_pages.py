@@ -0,0 +1,107 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import time
+
+import pytest
+
+QUEUE = [
+    {
+        "id": i,
+        "priority": 1,
+        "requester_email": "mine@example.com" if i % 3 == 0 else "other@example.com",
+        "bug_ids": [100000 + i],
+        "repo_name": "mozilla-central" if i % 2 == 0 else "comm-central",
+        "revision_order": [1000 + i, 2000 + i],
+        "created_at": "2019-10-08T16:55:31.208168+00:00",
+        "details": "not used by the queue page",
+    }
+    for i in range(2500)
+]
+
+
+@pytest.fixture
+def queue_api(app, api_url, requests_mock):
+    """Stand in for the Lando API landing queue endpoint."""
+    app.config["ENABLE_EMBEDDED_TRANSPLANT_UI"] = True
+
+    def landing_queue(request, context):
+        jobs = QUEUE
+        if "repository" in request.qs:
+            jobs = [j for j in jobs if j["repo_name"] == request.qs["repository"][0]]
+        if "requester_email" in request.qs:
+            email = request.qs["requester_email"][0]
+            jobs = [j for j in jobs if j["requester_email"] == email]
+        offset = int(request.qs["offset"][0])
+        return jobs[offset : offset + int(request.qs["limit"][0])]
+
+    return requests_mock.get(api_url + "/landing_queue", json=landing_queue)
+
+
+@pytest.fixture
+def signed_in(client):
+    with client.session_transaction() as session:
+        session["id_token"] = "foo_id_token"
+        session["access_token"] = "foo_access_token"
+        session["userinfo"] = {"picture": "", "email": "mine@example.com"}
+        session["id_token_jwt"] = "foo_jwt"
+        session["last_authenticated"] = time.time()
+
+
+def rows(rv):
+    return rv.get_data().count(b'class="QueuePage-revision"')
+
+
+def test_queue_first_page(client, signed_in, queue_api):
+    rv = client.get("/")
+
+    assert rv.status_code == 200
+    assert rv.is_streamed
+    assert rows(rv) == 100
+    assert b'href="/?page=2">Next' in rv.data
+    assert b"Previous" not in rv.data
+    assert queue_api.last_request.qs == {"offset": ["0"], "limit": ["101"]}
+
+
+def test_queue_last_page(client, signed_in, queue_api):
+    rv = client.get("/?page=25")
+
+    assert rows(rv) == 100
+    assert b"2401" in rv.data
+    assert b"Previous" in rv.data
+    assert b"Next" not in rv.data
+
+
+def test_queue_filters_passed_upstream(app, client, signed_in, queue_api):
+    app.config["LANDING_QUEUE_PAGE_SIZE"] = 1000
+    rv = client.get("/?repo=mozilla-central&mine=1")
+
+    assert rows(rv) == len(QUEUE[::6])
+    assert queue_api.last_request.qs == {
+        "offset": ["0"],
+        "limit": ["1001"],
+        "repository": ["mozilla-central"],
+        "requester_email": ["mine@example.com"],
+    }
+    assert b"other@example.com" not in rv.data
+    assert b"not used by the queue page" not in rv.data
+
+
+def test_queue_upstream_error_shown_in_page(
+    client, signed_in, queue_api, api_url, requests_mock
+):
+    requests_mock.get(api_url + "/landing_queue", status_code=500, json={})
+
+    rv = client.get("/")
+
+    assert rv.status_code == 200
+    assert rows(rv) == 0
+    assert b"The landing queue could not be loaded" in rv.data
+    assert b"There are no landings in the queue" not in rv.data
+
+
+def test_queue_not_shown_to_anonymous_users(client, queue_api):
+    rv = client.get("/")
+
+    assert rv.status_code == 200
+    assert not queue_api.called
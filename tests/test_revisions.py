@@ -0,0 +1,159 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import pytest
+
+from landoui.landoapi import stack_cache
+from tests.test_sec_approval_workflow import LANDO_API_STACK
+
+
+@pytest.fixture(autouse=True)
+def clear_stack_cache():
+    stack_cache.clear()
+    yield
+    stack_cache.clear()
+
+
+@pytest.fixture
+def stack_api(api_url, requests_mock):
+    requests_mock.get(api_url + "/stacks/D1", json=LANDO_API_STACK)
+    requests_mock.get(api_url + "/transplants", json=[])
+    return requests_mock
+
+
+def test_stack_graph_drawn_as_svg_by_default(app, client, stack_api):
+    rv = client.get("/D1/")
+
+    assert rv.status_code == 200
+    assert b'<g id="StackGraph"' in rv.data
+    assert b"StackPage-graphCanvas" not in rv.data
+
+
+def test_stack_graph_drawn_on_canvas_for_large_stacks(app, client, stack_api):
+    app.config["STACK_GRAPH_CANVAS_MIN_ROWS"] = 1
+
+    rv = client.get("/D1/")
+
+    assert rv.status_code == 200
+    assert b'<g id="StackGraph"' not in rv.data
+    assert b'class="GraphDrawing"' not in rv.data
+    assert b'data-graph="0,0,0,0"' in rv.data
+
+
+REJECT = "".join("@@ -{0} +{0} @@\n-old\n+new\n".format(i) for i in range(1000))
+
+FAILED_TRANSPLANT = {
+    "id": 7,
+    "status": "FAILED",
+    "created_at": "2021-01-01T00:00:00+00:00",
+    "updated_at": "2021-01-01T00:00:00+00:00",
+    "requester_email": "tuser@example.com",
+    "landing_path": [{"revision_id": "D1", "diff_id": 1}],
+    "details": "raw output " * 1000,
+    "error_breakdown": {
+        "revision_id": 1,
+        "failed_paths": [
+            {"path": "a.txt", "url": "http://hg.test/a", "changeset_id": "abc"},
+            {"path": "b.txt", "url": "http://hg.test/b", "changeset_id": "abc"},
+        ],
+        "reject_paths": {
+            "a.txt": {"path": "a.txt", "content": REJECT},
+            "b.txt": {"path": "b.txt", "content": "short\nreject"},
+        },
+    },
+}
+
+
+@pytest.fixture
+def failed_transplant_api(api_url, stack_api):
+    stack_api.get(api_url + "/transplants", json=[FAILED_TRANSPLANT])
+    return stack_api
+
+
+def test_timeline_only_includes_reject_snippets(app, client, failed_transplant_api):
+    rv = client.get("/D1/")
+
+    assert rv.status_code == 200
+    assert b"@@ -0 +0 @@\n-old\n...\n" in rv.data
+    assert b"@@ -1 +1 @@" not in rv.data
+    assert b"short\nreject</pre>" in rv.data
+    assert b"raw output" not in rv.data
+    assert b'data-content-url="/D1/transplants/7/output?path=a.txt"' in rv.data
+    assert b'data-content-url="/D1/transplants/7/output"' in rv.data
+
+
+def test_transplant_output_returns_full_reject(app, client, failed_transplant_api):
+    rv = client.get("/D1/transplants/7/output?path=a.txt")
+
+    assert rv.status_code == 200
+    assert rv.mimetype == "text/plain"
+    assert rv.get_data(as_text=True) == REJECT
+
+
+def test_transplant_output_returns_raw_output(app, client, failed_transplant_api):
+    rv = client.get("/D1/transplants/7/output")
+
+    assert rv.status_code == 200
+    assert rv.get_data(as_text=True) == FAILED_TRANSPLANT["details"]
+
+
+@pytest.mark.parametrize(
+    "url", ["/D1/transplants/8/output", "/D1/transplants/7/output?path=c.txt"]
+)
+def test_transplant_output_not_found(app, client, failed_transplant_api, url):
+    assert client.get(url).status_code == 404
+
+
+def test_timeline_fragment_only_fetches_transplants(app, client, failed_transplant_api):
+    rv = client.get("/D1/timeline")
+
+    assert rv.status_code == 200
+    assert rv.data.lstrip().startswith(
+        b'<div class="StackPage-timeline" data-timeline-url="/D1/timeline">'
+    )
+    assert b'data-content-url="/D1/transplants/7/output?path=a.txt"' in rv.data
+    assert [r.path for r in failed_transplant_api.request_history] == ["/transplants"]
+
+
+def test_streamed_stack_page_matches_rendered_page(app, client, stack_api):
+    rendered = client.get("/D1/")
+    app.config["STREAM_STACK_PAGE"] = True
+
+    streamed = client.get("/D1/")
+
+    assert streamed.status_code == 200
+    assert streamed.data == rendered.data
+
+
+def test_streamed_stack_page_sends_layout_before_fetching_stack(app, client, stack_api):
+    app.config["STREAM_STACK_PAGE"] = True
+
+    rv = client.get("/D1/", buffered=False)
+    chunks = iter(rv.response)
+    head = b""
+    while b"</head>" not in head:
+        head += next(chunks)
+
+    assert b"<title>D1 - Lando - Mozilla</title>" in head
+    assert "/stacks/d1" not in [r.path for r in stack_api.request_history]
+
+    body = head + b"".join(chunks)
+    assert "/stacks/d1" in [r.path for r in stack_api.request_history]
+    assert b'<g id="StackGraph"' in body
+    rv.close()
+
+
+def test_streamed_stack_page_not_found(app, client, api_url, stack_api):
+    app.config["STREAM_STACK_PAGE"] = True
+    stack_api.get(api_url + "/stacks/D1", status_code=404, json={"status": 404})
+
+    rv = client.get("/D1/")
+
+    # The status was sent before the stack was fetched, so the error is
+    # shown in place of the rest of the page.
+    assert b"<h1>Revision/Diff Not Available</h1>" in rv.data
+    assert rv.data.count(b"<!DOCTYPE html>") == 1
+    assert rv.data.count(b"<head>") == 1
+
+    # Later error pages still have the layout.
+    assert b"<!DOCTYPE html>" in client.get("/nonexistent").data
@@ -174,8 +174,8 @@ def anonymous_session(client):
 
 
 def sec_approval_revision_in_page(rv) -> bool:
-    """Does the given response contain a sec-approval revision in its content?"""
-    return SEC_APPROVAL_HTML_MARK in rv.data
+    """Does the given landing preview contain a sec-approval revision?"""
+    return SEC_APPROVAL_HTML_MARK.decode() in rv.get_json()["html"]
 
 
 def test_view_stack_not_logged_in(client, anonymous_session, apidouble):
@@ -184,16 +184,39 @@ def test_view_stack_not_logged_in(client, anonymous_session, apidouble):
     assert rv.status_code == 200
 
 
-def test_view_stack_logged_in(client, authenticated_session):
+def test_view_stack_logged_in(client, authenticated_session, apidouble):
     # Basic happy-path test for a logged in user.
     rv = client.get("/D1/")
     assert rv.status_code == 200
 
+    # The dryrun is left until the landing preview is opened.
+    operations = [c.args[2] for c in apidouble.call_args_list]
+    assert "transplants/dryrun" not in operations
+
+
+def test_landing_preview_runs_dryrun(client, authenticated_session, apidouble):
+    rv = client.get("/D1/landing-preview")
+    assert rv.status_code == 200
+    assert rv.get_json()["landing_path"] == '[{"revision_id": "D1", "diff_id": 2}]'
+    assert "StackPage-landingPreview-commitList" in rv.get_json()["html"]
+    apidouble.assert_any_call(
+        ANY,
+        "POST",
+        "transplants/dryrun",
+        require_auth0=True,
+        json={"landing_path": [{"revision_id": "D1", "diff_id": 2}]},
+    )
+
+
+def test_landing_preview_requires_login(client, anonymous_session):
+    rv = client.get("/D1/landing-preview")
+    assert rv.status_code == 401
+
 
 def test_sec_approval_workflow_mark_hidden_if_revision_is_public(
     client, authenticated_session
 ):
-    rv = client.get("/D1/")
+    rv = client.get("/D1/landing-preview")
     assert rv.status_code == 200
     assert not sec_approval_revision_in_page(rv)
 
@@ -202,7 +225,7 @@ def test_sec_approval_workflow_mark_shown_if_revision_is_secure(
     client, authenticated_session, apidouble
 ):
     apidouble.side_effect.stack_response["revisions"][0]["is_secure"] = True
-    rv = client.get("/D1/")
+    rv = client.get("/D1/landing-preview")
     assert rv.status_code == 200
     assert sec_approval_revision_in_page(rv)
 
@@ -212,7 +235,7 @@ def test_sec_approval_workflow_mark_hidden_if_feature_flag_is_off(
 ):
     app.config["ENABLE_SEC_APPROVAL"] = False
     apidouble.side_effect.stack_response["revisions"][0]["is_secure"] = True
-    rv = client.get("/D1/")
+    rv = client.get("/D1/landing-preview")
     assert rv.status_code == 200
     assert not sec_approval_revision_in_page(rv)
 
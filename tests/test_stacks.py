@@ -1,15 +1,38 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
+import random
+import sys
+import time
+from types import SimpleNamespace
+
 import pytest
 
 from landoui.stacks import (
     draw_stack_graph,
     Edge,
+    graph,
+    pack_drawing,
     sort_stack_topological,
+    StackGraph,
 )
 
 
+def random_stack(size, *, seed, max_parents=2):
+    """Return the nodes and edges of a random stack with wide fan-out.
+
+    Every node after the first has between one and `max_parents` parents
+    chosen uniformly from the nodes before it.
+    """
+    rng = random.Random(seed)
+    nodes = set(range(size))
+    edges = set()
+    for child in range(1, size):
+        for _ in range(rng.randint(1, max_parents)):
+            edges.add(Edge(child=child, parent=rng.randrange(child)))
+    return nodes, edges
+
+
 def test_sort_stack_topological_single_node():
     order = sort_stack_topological({"PHID-DREV-0"}, set())
     assert len(order) == 1
@@ -46,6 +69,63 @@ def test_sort_stack_topological_cycle():
         sort_stack_topological(nodes, edges)
 
 
+def test_sort_stack_topological_key_called_once_per_node():
+    calls = []
+
+    def key(node):
+        calls.append(node)
+        return -node
+
+    nodes = set(range(10))
+    order = sort_stack_topological(nodes, set(), key=key)
+
+    assert order == list(reversed(range(10)))
+    assert sorted(calls) == list(range(10))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sort_stack_topological_matches_selection_sort(seed):
+    nodes, edges = random_stack(60, seed=seed, max_parents=3)
+    shuffled = random.Random(seed).sample(range(60), 60)
+    key = shuffled.__getitem__
+
+    # The straightforward O(V^2) formulation of the same ordering.
+    g = graph(nodes, edges)
+    sources = {node for node in g if not g[node].parents}
+    expected = []
+    while sources:
+        node = min(sources, key=key)
+        sources.remove(node)
+        expected.append(node)
+        for child in g.pop(node).children:
+            g[child].parents.remove(node)
+            if not g[child].parents:
+                sources.add(child)
+
+    assert sort_stack_topological(nodes, edges, key=key) == expected
+
+
+def test_sort_stack_topological_scales_linearithmically():
+    def best_time(size):
+        nodes, edges = random_stack(size, seed=size)
+        # One root with every other node hanging directly off of it, then a
+        # random stack: both have thousands of simultaneous sources.
+        wide = {Edge(child=i, parent=0) for i in range(1, size)}
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            sort_stack_topological(nodes, edges)
+            sort_stack_topological(nodes, wide)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    small = best_time(1000)
+    large = best_time(10000)
+
+    # 10x the nodes is ~13x the work for O(n log n); quadratic is ~100x.
+    assert large / small < 40
+
+
 def test_sort_stack_topological_complex():
     nodes = set("PHID-DREV-{}".format(i) for i in range(10))
     edges = {
@@ -106,3 +186,158 @@ def test_draw_stack_graph_complex():
         {"above": [0], "below": [0], "node": "PHID-DREV-9", "other": [], "pos": 0},
         {"above": [], "below": [0], "node": "PHID-DREV-8", "other": [], "pos": 0},
     ]
+
+
+def reference_draw_stack_graph(nodes, edges, order):
+    """The original list scanning implementation of `draw_stack_graph`."""
+    g = graph(nodes, edges)
+    next_node = []
+    drawing = SimpleNamespace(rows=[], width=0)
+
+    def empty_column_or_new():
+        if not next_node.count(None):
+            next_node.append(None)
+            drawing.width += 1
+            return drawing.width - 1
+
+        return next_node.index(None)
+
+    for i, node in enumerate(order):
+        col = next_node.index(node) if next_node.count(node) else empty_column_or_new()
+
+        below = set()
+        for from_col in range(len(next_node)):
+            target = next_node[from_col]
+            if target == node:
+                below.add(from_col)
+                next_node[from_col] = None
+
+        other = {i for i, target in enumerate(next_node) if target is not None}
+
+        above = set()
+        if g[node].children:
+            closest = order[min([order.index(child) for child in g[node].children])]
+            next_node[col] = closest
+            above.add(col)
+
+            for child in g[node].children:
+                if child != closest:
+                    position = empty_column_or_new()
+                    next_node[position] = child
+                    above.add(position)
+
+        drawing.rows.append(
+            {
+                "node": node,
+                "pos": col,
+                "above": sorted(above),
+                "below": sorted(below),
+                "other": sorted(other),
+            }
+        )
+
+    return drawing.width, drawing.rows
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_draw_stack_graph_matches_reference(seed):
+    rng = random.Random(seed)
+    size = rng.randint(1, 80)
+    nodes, edges = random_stack(size, seed=seed, max_parents=rng.randint(1, 4))
+    # Detach some nodes to get several independent stacks side by side.
+    edges = {e for e in edges if rng.random() > 0.1}
+    phids = {node: "PHID-DREV-{}".format(node) for node in nodes}
+    nodes = set(phids.values())
+    edges = {Edge(child=phids[e.child], parent=phids[e.parent]) for e in edges}
+    keys = {phid: rng.random() for phid in nodes}
+    order = sort_stack_topological(nodes, edges, key=keys.__getitem__)
+
+    assert draw_stack_graph(nodes, edges, order) == reference_draw_stack_graph(
+        nodes, edges, order
+    )
+
+
+def test_pack_drawing():
+    rows = [
+        {"pos": 0, "above": [0, 2], "below": [], "other": []},
+        {"pos": 1, "above": [], "below": [1], "other": [0, 2, 3, 4, 6]},
+    ]
+
+    assert pack_drawing(rows) == "0,2,0,2,0,0,1,0,1,1,3,0,1,2,3,6,1"
+    assert pack_drawing([]) == ""
+
+
+def stack_response():
+    revisions = [
+        {"id": "D{}".format(i), "phid": "PHID-DREV-{}".format(i)} for i in range(1, 6)
+    ]
+    return {
+        "revisions": revisions,
+        "repositories": [{"phid": "PHID-REPO-1", "short_name": "central"}],
+        # D1 <- D2 <- D3, D2 <- D4 <- D5
+        "edges": [
+            ["PHID-DREV-2", "PHID-DREV-1"],
+            ["PHID-DREV-3", "PHID-DREV-2"],
+            ["PHID-DREV-4", "PHID-DREV-2"],
+            ["PHID-DREV-5", "PHID-DREV-4"],
+        ],
+        "landable_paths": [
+            ["PHID-DREV-1", "PHID-DREV-2", "PHID-DREV-3"],
+            ["PHID-DREV-1", "PHID-DREV-2", "PHID-DREV-4"],
+        ],
+    }
+
+
+def test_stack_graph_matches_functions():
+    stack = stack_response()
+    stack_graph = StackGraph(stack)
+    nodes = {r["phid"] for r in stack["revisions"]}
+    edges = {Edge(child=c, parent=p) for c, p in stack["edges"]}
+    order = sort_stack_topological(
+        nodes, edges, key=lambda x: int(stack_graph.revisions[x]["id"][1:])
+    )
+
+    assert stack_graph.order == order
+    assert stack_graph.drawing == draw_stack_graph(nodes, edges, order)
+    assert stack_graph.repositories == {"PHID-REPO-1": stack["repositories"][0]}
+
+
+def test_stack_graph_memoizes():
+    stack_graph = StackGraph(stack_response())
+
+    assert stack_graph.graph is stack_graph.graph
+    assert stack_graph.order is stack_graph.order
+    assert stack_graph.drawing is stack_graph.drawing
+    assert stack_graph.series("PHID-DREV-2") == stack_graph.series("PHID-DREV-2")
+
+
+def test_stack_graph_landable_and_series():
+    stack_graph = StackGraph(stack_response())
+
+    assert stack_graph.phid("D4") == "PHID-DREV-4"
+    assert stack_graph.phid("D99") is None
+    assert stack_graph.landable == {
+        "PHID-DREV-1",
+        "PHID-DREV-2",
+        "PHID-DREV-3",
+        "PHID-DREV-4",
+    }
+    assert stack_graph.series("PHID-DREV-3") == [
+        "PHID-DREV-1",
+        "PHID-DREV-2",
+        "PHID-DREV-3",
+    ]
+    assert stack_graph.series("PHID-DREV-2") == ["PHID-DREV-1", "PHID-DREV-2"]
+    assert stack_graph.series("PHID-DREV-5") is None
+    assert stack_graph.series(None) is None
+
+
+def test_stack_graph_interns_phids():
+    stack = stack_response()
+    for revision in stack["revisions"]:
+        # Build strings at runtime so they aren't already interned.
+        revision["phid"] = "".join(["PHID-DREV-", revision["id"][1:]])
+    stack_graph = StackGraph(stack)
+
+    for phid in stack_graph.revisions:
+        assert phid is sys.intern("".join(["PHID-DREV-", phid[10:]]))
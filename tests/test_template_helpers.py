@@ -4,9 +4,18 @@
 import urllib.parse
 
 import pytest
+from flask import Markup
 
+from landoui.jsoncodec import Truncated
 from landoui.template_helpers import (
+    _render_graph_svg,
     avatar_url,
+    graph_above_path,
+    graph_below_path,
+    graph_svg,
+    graph_x_pos,
+    escape_html,
+    linkify,
     linkify_bug_numbers,
     linkify_revision_urls,
     linkify_faq,
@@ -14,6 +23,7 @@ from landoui.template_helpers import (
     repo_path,
     calculate_duration,
     revision_url,
+    truncation_note,
 )
 
 
@@ -223,3 +233,114 @@ def test_revision_url__general_case_with_diff(app):
     expected_result = "http://phabricator.test/D123?id=456"
     actual_result = revision_url(revision_id, diff_id)
     assert expected_result == actual_result
+
+
+def test_truncation_note():
+    assert truncation_note("complete") == ""
+    assert truncation_note(None) == ""
+    assert truncation_note(Truncated("abc", 10)) == "\n[7 more characters not shown]"
+
+
+def graph_row(pos, above=(), below=(), other=()):
+    return (
+        None,
+        {"pos": pos, "above": list(above), "below": list(below), "other": list(other)},
+    )
+
+
+def test_graph_svg_merges_vertical_lines():
+    rows = [
+        graph_row(0, other=[1]),
+        graph_row(0, other=[1]),
+        graph_row(0, other=[1]),
+        graph_row(1, below=[1]),
+    ]
+    svg = graph_svg(rows)
+
+    assert svg.count("<line") == 1
+    assert '<line x1="21" x2="21" y1="0" y2="132"/>' in svg
+
+
+def test_graph_svg_paths_are_offset_by_row():
+    rows = [graph_row(0, below=[0, 1]), graph_row(0, above=[0]), graph_row(1)]
+    svg = graph_svg(rows)
+
+    # Row 0 curves down to column 1, row 2's node sits in column 1.
+    assert '<path d="M7 22c0 11 14 11 14 22"/>' in svg
+    assert '<path d="M7 44c0 11 0 11 0 22"/>' in svg
+    assert '<circle cx="21" cy="110" r="3" fill="#cc0099"/>' in svg
+    assert svg.count("<circle") == 3
+    assert '<g id="StackGraph"' in svg
+
+
+def test_graph_svg_draws_nodes_over_strokes():
+    # Row 1's node is in column 0 but a curve in column 1's colour ends on it.
+    rows = [graph_row(1, below=[0]), graph_row(0, above=[1]), graph_row(0)]
+    svg = graph_svg(rows)
+
+    assert svg.rindex("<path") < svg.index("<circle")
+    assert svg.count("<circle") == 3
+
+
+def test_graph_svg_is_cached():
+    rows = [graph_row(0, below=[0]), graph_row(0, above=[0])]
+    graph_svg(rows)
+    hits = _render_graph_svg.cache_info().hits
+
+    assert graph_svg(list(rows)) == graph_svg(rows)
+    assert _render_graph_svg.cache_info().hits == hits + 2
+
+
+@pytest.mark.parametrize("col", [0, 1, 255, 256, 1000])
+def test_graph_x_pos(col):
+    assert graph_x_pos(col) == 14 * col + 7
+
+
+def test_graph_paths():
+    assert graph_above_path(0, 2) == "M 35.0 0 C 35.0 11.0, 7.0 11.0, 7.0 22.0"
+    assert graph_below_path(0, 2) == "M 7.0 22.0 C 7.0 33.0, 35.0 33.0, 35.0 44"
+
+
+LINKIFY_TEXTS = [
+    "",
+    "Nothing to link here",
+    'Bug 123 - Fix <things> & "stuff". r=test',
+    "bug 4 and BUG 5, see http://phabricator.test/D123 or the faq.",
+    "Read the FAQ and the Security Bug Approval Process (bug 1413384).",
+    "Quoted 'http://phabricator.test/D201525' and <Bug 7>",
+    "http://phabricator.test/herald/ is not a revision, faqual is not FAQ",
+    "Multiple\nlines Bug 1\nhttp://phabricator.test/D2\n\nFAQ" * 50,
+]
+
+
+def linkify_chain(text, kinds):
+    text = escape_html(text)
+    for kind, linkify_kind in (
+        ("bugs", linkify_bug_numbers),
+        ("revisions", linkify_revision_urls),
+        ("faq", linkify_faq),
+        ("sec_docs", linkify_sec_bug_docs),
+    ):
+        if kind in kinds:
+            text = linkify_kind(text)
+    return text
+
+
+@pytest.mark.parametrize("text", LINKIFY_TEXTS)
+@pytest.mark.parametrize(
+    "kinds",
+    [(), ("bugs", "revisions"), ("faq",), ("sec_docs", "bugs")],
+)
+def test_linkify_matches_filter_chain(app, text, kinds):
+    expected = linkify_chain(text, kinds or ("bugs", "revisions", "faq", "sec_docs"))
+
+    result = linkify(text, *kinds)
+
+    assert isinstance(result, Markup)
+    assert result == expected
+
+
+def test_linkify_does_not_escape_markup_twice(app):
+    text = Markup("<b>Bug 1</b> &amp; FAQ")
+
+    assert linkify(text) == linkify_chain(text, ("bugs", "faq"))